@@ -0,0 +1,85 @@
+"""
+Admission control for the recommend endpoint.
+
+A bounded number of requests may run inference at once and a bounded number
+may wait for a slot. Requests beyond the queue bound are rejected straight
+away with 429; requests that cannot get a slot before their queue timeout or
+deadline are rejected with 503. Both carry a ``Retry-After`` hint.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of being served."""
+
+    status_code = 503
+
+    def __init__(self, detail: str, retry_after: int = 1):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class QueueFull(Overloaded):
+    status_code = 429
+
+
+class DeadlineExceeded(Overloaded):
+    status_code = 503
+
+
+def check_deadline(deadline, retry_after: int = 1):
+    """Raise DeadlineExceeded if the monotonic ``deadline`` has passed."""
+    if deadline is not None and time.monotonic() > deadline:
+        raise DeadlineExceeded("Request deadline exceeded before inference", retry_after)
+
+
+class AdmissionController:
+    """Bounded inference queue with a concurrency limit and queue timeout."""
+
+    def __init__(self, max_concurrency: int = 2, max_queue: int = 16,
+                 queue_timeout: float = 2.0, retry_after: int = 1):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+        self.active = 0
+        self.stats = {"admitted": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+
+    async def _wait_for_slot(self, deadline: float):
+        if self.waiting >= self.max_queue:
+            self.stats["rejected_queue_full"] += 1
+            raise QueueFull("Inference queue is full", self.retry_after)
+
+        timeout = min(self.queue_timeout, deadline - time.monotonic())
+        self.waiting += 1
+        try:
+            if timeout <= 0:
+                raise asyncio.TimeoutError
+            await asyncio.wait_for(self._slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self.stats["rejected_timeout"] += 1
+            raise Overloaded("Timed out waiting for an inference slot", self.retry_after)
+        finally:
+            self.waiting -= 1
+
+    @asynccontextmanager
+    async def slot(self, deadline: float):
+        """Hold one inference slot for the duration of the ``async with`` block."""
+        if self._slots.locked():
+            await self._wait_for_slot(deadline)
+        else:
+            await self._slots.acquire()
+
+        self.stats["admitted"] += 1
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._slots.release()
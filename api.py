@@ -1,15 +1,31 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
-import faiss
-import pickle
-
-import json
-import numpy as np
+import asyncio
+from contextlib import asynccontextmanager
+import os
+import time
+import torch
 from sentence_transformers import SentenceTransformer
-from rerank import infer_intent, rerank_results
+from sentence_transformers.util import batch_to_device
+import rerank
+from rerank import distances_to_similarity, infer_intent, mmr_order, rerank_ids
+from catalog_artifact import CATALOG_PATH
+from catalog_registry import DEFAULT_CATALOG, Catalog, CatalogRegistry, UnknownCatalog
+from catalog_store import url_slug
+from shard_search import shard_paths
+from long_query import POOLING_MODES, search_long_query
+from url_ingest import FetchError, JobDescriptionFetcher, UnsafeURL
+from cross_rerank import CrossEncoderStage
+from admission import AdmissionController, Overloaded, check_deadline
+from profiling import NULL_TIMER, SamplingProfiler, StageTimer
+from jobs import InvalidUpload, JobManager, JobTooLarge
+from query_cache import NearDuplicateCache
+from shadow import ShadowRunner
 
 # ===============================
 # APP INIT
@@ -32,20 +48,187 @@ app.add_middleware(
 # ===============================
 # LOAD MODEL + DATA
 # ===============================
-index = faiss.read_index("shl_faiss.index")
+# Tuned quotas / keywords / depth written by tune_rerank.py, if present
+rerank_config = rerank.load_config(os.getenv("RERANK_CONFIG", "rerank_config.json"))
+
+# Item-item similarity for MMR diversification, written by embeddings_faiss.py
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "1.0"))
+
+# ===============================
+# CATALOGS
+# ===============================
+# Additional catalogs (regional variants, client subsets) are listed in a JSON
+# file and loaded on first use; loaded catalogs are evicted LRU once their
+# combined size exceeds the memory budget. The encoder is shared by all.
+catalogs = CatalogRegistry(
+    memory_budget_bytes=int(os.getenv("CATALOG_MEMORY_BUDGET_MB", "512")) * 1024 * 1024,
+    load_similarity=MMR_LAMBDA < 1.0,
+    shard_timeout=float(os.getenv("SHARD_TIMEOUT_MS", "500")) / 1000,
+)
+CATALOGS_FILE = os.getenv("CATALOGS_FILE", "catalogs.json")
 
-with open("metadata.pkl", "rb") as f:
-    metadata = pickle.load(f)
+# INDEX_SHARDS=N searches the shards written by `embeddings_faiss.py --shards N`
+INDEX_SHARDS = int(os.getenv("INDEX_SHARDS", "0"))
 
+catalogs.register(
+    DEFAULT_CATALOG, "shl_faiss.index", CATALOG_PATH, "shl_similarity.npy",
+    shards=shard_paths("shl_faiss", INDEX_SHARDS) if INDEX_SHARDS > 1 else None,
+    neighbors="shl_neighbors.npy",
+)
+if os.path.exists(CATALOGS_FILE):
+    catalogs.register_file(CATALOGS_FILE)
+
+# Load the default catalog at startup so the first request does not pay for it
+default_catalog = catalogs.get(DEFAULT_CATALOG)
 
 model = SentenceTransformer("all-MiniLM-L6-v2")
 
+# ===============================
+# LONG QUERY SETTINGS
+# ===============================
+# "off" encodes the query as-is (truncated by the model); "mean" / "max" pool
+# chunk embeddings; "multi" searches every chunk and fuses the results.
+LONG_QUERY_MODE = os.getenv("LONG_QUERY_MODE", "off")
+LONG_QUERY_TOKEN_BUDGET = int(os.getenv("LONG_QUERY_TOKEN_BUDGET", "1024"))
+LONG_QUERY_OVERLAP = int(os.getenv("LONG_QUERY_OVERLAP", "32"))
+
+if LONG_QUERY_MODE != "off" and LONG_QUERY_MODE not in POOLING_MODES:
+    raise ValueError(f"Unknown LONG_QUERY_MODE: {LONG_QUERY_MODE}")
+
+# ===============================
+# NEAR-DUPLICATE QUERY CACHE (off by default)
+# ===============================
+# Queries that are near-copies of a recent one (same JD, edited dates or
+# salary) reuse its search results instead of being encoded again.
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "0"))
+
+query_cache = None
+if QUERY_CACHE_SIZE > 0:
+    query_cache = NearDuplicateCache(
+        capacity=QUERY_CACHE_SIZE,
+        threshold=float(os.getenv("QUERY_CACHE_THRESHOLD", "0.9")),
+        drift_sample_rate=float(os.getenv("QUERY_CACHE_DRIFT_SAMPLE", "0.05")),
+    )
+
+# ===============================
+# CROSS-ENCODER STAGE (optional)
+# ===============================
+# e.g. CROSS_ENCODER_MODEL=cross-encoder/ms-marco-MiniLM-L-6-v2
+CROSS_ENCODER_MODEL = os.getenv("CROSS_ENCODER_MODEL", "")
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "150"))
+
+cross_stage = None
+if CROSS_ENCODER_MODEL:
+    cross_stage = CrossEncoderStage(CROSS_ENCODER_MODEL, budget_ms=RERANK_BUDGET_MS)
+
+# ===============================
+# ADMISSION CONTROL
+# ===============================
+REQUEST_DEADLINE_S = float(os.getenv("REQUEST_DEADLINE_S", "10"))
+
+admission = AdmissionController(
+    max_concurrency=int(os.getenv("INFERENCE_CONCURRENCY", "2")),
+    max_queue=int(os.getenv("INFERENCE_QUEUE_SIZE", "16")),
+    queue_timeout=float(os.getenv("INFERENCE_QUEUE_TIMEOUT_S", "2")),
+    retry_after=int(os.getenv("RETRY_AFTER_S", "1")),
+)
+
+# ===============================
+# TIMING / PROFILING (off by default)
+# ===============================
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+# The admin endpoints are only enabled when a token is configured
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Active profiling session: {"profiler": SamplingProfiler, "requests": int}
+profile_session = None
+
+# ===============================
+# JOB DESCRIPTION URL FETCHER
+# ===============================
+jd_fetcher = JobDescriptionFetcher(
+    per_host_limit=int(os.getenv("URL_FETCH_PER_HOST", "4")),
+    timeout=float(os.getenv("URL_FETCH_TIMEOUT", "10")),
+)
+
+# ===============================
+# BULK SCORING JOBS
+# ===============================
+def score_batch(catalog_name: str, queries: List[str], top_k: int):
+    """Score many queries with the /recommend pipeline, batching the encode and
+    FAISS search when queries are encoded whole.
+    """
+    with catalogs.using(catalog_name) as catalog:
+        k = min(rerank.CANDIDATE_DEPTH, len(catalog))
+        if LONG_QUERY_MODE == "off":
+            q_emb = model.encode(queries, batch_size=len(queries)).astype("float32")
+            D, I = catalog.index.search(q_emb, k)
+            candidates = [(ids[ids >= 0], distances_to_similarity(d[ids >= 0])) for d, ids in zip(D, I)]
+        else:
+            candidates = [search_uncached(catalog, query, k)[:2] for query in queries]
+
+        results = []
+        for query, (ids, scores) in zip(queries, candidates):
+            selected = rank(catalog, query, ids, scores, top_k, time.perf_counter())
+            results.append([catalog.store.record(idx) for idx in selected])
+        return results
+
+# Jobs only encode while no interactive request is running or queued
+jobs = JobManager(
+    score_batch,
+    work_dir=os.getenv("JOBS_DIR", "jobs"),
+    batch_size=int(os.getenv("JOB_BATCH_SIZE", "64")),
+    is_busy=lambda: admission.active > 0 or admission.waiting > 0,
+    max_upload_bytes=int(os.getenv("JOB_MAX_UPLOAD_MB", "50")) * 1024 * 1024,
+    ttl=float(os.getenv("JOB_TTL_HOURS", "24")) * 3600,
+)
+
+# ===============================
+# SHADOW TRAFFIC (off by default)
+# ===============================
+# A candidate index and/or encoder that receives a sample of default-catalog
+# /recommend queries off the response path; see GET /admin/shadow.
+SHADOW_INDEX = os.getenv("SHADOW_INDEX", "")
+SHADOW_MODEL = os.getenv("SHADOW_MODEL", "")
+
+# A candidate encoder needs an index built with it: its embeddings are not
+# comparable with the serving index's
+if SHADOW_MODEL and not SHADOW_INDEX:
+    raise ValueError("SHADOW_MODEL requires SHADOW_INDEX, an index built with that model")
+
+shadow = None
+if SHADOW_INDEX:
+    shadow_catalog = Catalog(
+        "shadow", SHADOW_INDEX, os.getenv("SHADOW_METADATA", CATALOG_PATH),
+        os.getenv("SHADOW_SIMILARITY") if MMR_LAMBDA < 1.0 else None,
+    )
+    shadow_model = SentenceTransformer(SHADOW_MODEL) if SHADOW_MODEL else model
+    if shadow_model.get_sentence_embedding_dimension() != shadow_catalog.index.d:
+        raise ValueError(
+            f"SHADOW_INDEX has dimension {shadow_catalog.index.d}, but the shadow encoder "
+            f"produces {shadow_model.get_sentence_embedding_dimension()}"
+        )
+
+    def shadow_recommend(query: str, top_k: int) -> List[str]:
+        """The /recommend pipeline with the candidate index (and encoder) swapped in."""
+        ids = recommend(shadow_catalog, query, top_k, encoder=shadow_model)
+        return [shadow_catalog.store.urls[idx] for idx in ids]
+
+    shadow = ShadowRunner(
+        shadow_recommend,
+        sample_rate=float(os.getenv("SHADOW_SAMPLE_RATE", "0.1")),
+        queue_size=int(os.getenv("SHADOW_QUEUE_SIZE", "64")),
+        is_busy=lambda: admission.active > 0 or admission.waiting > 0,
+    )
+
 # ===============================
 # REQUEST / RESPONSE MODELS
 # ===============================
 class QueryRequest(BaseModel):
-    query: str
+    query: Optional[str] = None
+    url: Optional[str] = None
     top_k: int = 6
+    catalog: Optional[str] = None
 
 class AssessmentResponse(BaseModel):
     assessment_name: str
@@ -55,24 +238,123 @@ class AssessmentResponse(BaseModel):
 # ===============================
 # RECOMMEND FUNCTION
 # ===============================
-def recommend(query: str, top_k: int):
-    q_emb = model.encode([query]).astype("float32")
+def encode_query(query: str, timer=NULL_TIMER, encoder=None):
+    encoder = encoder or model
+    if not timer.enabled:
+        return encoder.encode([query]).astype("float32")
+
+    # Same steps as model.encode, split so tokenization can be timed on its own
+    with timer.stage("tokenize"):
+        features = encoder.tokenize([query])
+    with timer.stage("encode"):
+        with torch.inference_mode():
+            features = batch_to_device(features, encoder.device)
+            q_emb = encoder(features)["sentence_embedding"]
+    return q_emb.cpu().numpy().astype("float32")
+
+
+def search_uncached(catalog: Catalog, query: str, k: int, timer=NULL_TIMER, encoder=None):
+    """Candidate ids, their similarity to the query (None when the search has no
+    distances, e.g. long-query fusion) and the query embedding when it was encoded whole.
+    """
+    q_emb = None
+    scores = None
+    if LONG_QUERY_MODE == "off":
+        q_emb = encode_query(query, timer, encoder)
+        with timer.stage("search"):
+            D, I = catalog.index.search(q_emb, k)
+        ids = I[0]
+        scores = distances_to_similarity(D[0])
+    else:
+        with timer.stage("encode_search"):
+            ids = search_long_query(
+                encoder or model, catalog.index, query, k,
+                pooling=LONG_QUERY_MODE,
+                overlap=LONG_QUERY_OVERLAP,
+                token_budget=LONG_QUERY_TOKEN_BUDGET,
+            )
+
+    # A sharded search that lost a shard pads its result with -1
+    found = ids >= 0
+    return ids[found], (scores[found] if scores is not None else None), q_emb
+
+
+def search(catalog: Catalog, query: str, k: int, timer=NULL_TIMER):
+    """Candidate ids and their query similarities, through the near-duplicate cache if enabled."""
+    if query_cache is None:
+        return search_uncached(catalog, query, k, timer)[:2]
+
+    namespace = (catalog.name, k)
+    with timer.stage("query_cache"):
+        signature = query_cache.signature(query)
+        entry = query_cache.lookup(namespace, signature)
+
+    if entry is None:
+        ids, scores, q_emb = search_uncached(catalog, query, k, timer)
+        query_cache.add(namespace, signature, ids, q_emb, scores)
+        return ids, scores
+
+    if query_cache.should_check_drift():
+        # Sampled hit: compute the real answer and record how far the cached one was
+        ids, scores, q_emb = search_uncached(catalog, query, k, timer)
+        query_cache.record_drift(entry, ids, q_emb)
+        return ids, scores
+    return entry.ids, entry.scores
+
+
+def recommend(catalog: Catalog, query: str, top_k: int, deadline: Optional[float] = None,
+              timer=NULL_TIMER, encoder=None):
+    """Ranked ids for a query. ``encoder`` swaps in another encoder (shadow
+    traffic); its searches bypass the query cache, which holds the serving
+    encoder's results.
+    """
+    started = time.perf_counter()
 
-    k = min(10, len(metadata))
-    _, I = index.search(q_emb, k)
+    # Drop requests that timed out while queued before they reach the encoder
+    check_deadline(deadline, admission.retry_after)
 
-    results = []
-    for idx in I[0]:
-        results.append({
-            "assessment_name": metadata[idx]["assessment_name"],
-            "url": metadata[idx]["url"],
-            "test_type": metadata[idx]["test_type"]
-        })
+    k = min(rerank.CANDIDATE_DEPTH, len(catalog))
+    if encoder is None:
+        ids, scores = search(catalog, query, k, timer)
+    else:
+        ids, scores = search_uncached(catalog, query, k, timer, encoder)[:2]
+    return rank(catalog, query, ids, scores, top_k, started, timer)
 
-    intent = infer_intent(query)
-    final_results = rerank_results(results, intent, top_k)
 
-    return final_results
+def rank(catalog: Catalog, query: str, ids, scores, top_k: int, started: float, timer=NULL_TIMER):
+    """Cross-encoder (budgeted from ``started``), MMR and intent quotas over FAISS candidates."""
+    if cross_stage is not None:
+        with timer.stage("cross_encoder"):
+            reranked = cross_stage.rerank(query, ids, catalog.passages, started, namespace=catalog.name)
+        if list(reranked) != list(ids):
+            # The cross-encoder order is now the relevance order
+            ids, scores = reranked, None
+
+    with timer.stage("rerank"):
+        if catalog.similarity is not None:
+            ids = mmr_order(ids, catalog.similarity, MMR_LAMBDA, scores)
+
+        intent = infer_intent(query)
+        return rerank_ids(ids, catalog.store.type_codes, catalog.store.valid, intent, top_k)
+
+
+@asynccontextmanager
+async def use_catalog(name: Optional[str]):
+    """Hold a catalog for the duration of a request, loading it off the event loop if needed.
+
+    The reference keeps an evicted catalog (and its shard workers) open until
+    the request is done with it.
+    """
+    catalog = catalogs.acquire_loaded(name or DEFAULT_CATALOG)
+    if catalog is None:
+        try:
+            catalog = await run_in_threadpool(catalogs.acquire, name or DEFAULT_CATALOG)
+        except UnknownCatalog:
+            raise HTTPException(status_code=404, detail=f"Unknown catalog: {name}")
+    try:
+        yield catalog
+    finally:
+        catalogs.release(catalog)
 
 # ===============================
 # API ENDPOINTS
@@ -86,9 +368,186 @@ def health():
     """Health check endpoint for Render"""
     return {
         "status": "healthy",
-        "assessments_loaded": len(metadata)
+        "assessments_loaded": len(default_catalog),
+        "catalogs_loaded": catalogs.loaded(),
+        "inference_active": admission.active,
+        "inference_waiting": admission.waiting,
+        "query_cache": query_cache.stats() if query_cache is not None else None
     }
 
+@app.exception_handler(Overloaded)
+async def shed_request(request: Request, exc: Overloaded):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.on_event("startup")
+async def start_jobs():
+    jobs.start()
+    if shadow is not None:
+        shadow.start()
+
+@app.on_event("shutdown")
+async def close_fetcher():
+    await jd_fetcher.aclose()
+
+@app.get("/suggest")
+async def suggest(prefix: str, limit: int = Query(10, ge=1, le=10), catalog: Optional[str] = None):
+    """Assessment names completing `prefix`; answered from a precomputed trie, no model call."""
+    async with use_catalog(catalog) as catalog:
+        ids = catalog.suggest.lookup(prefix, limit) if prefix.strip() else ()
+        return Response(content=catalog.store.render(ids), media_type="application/json")
+
+@app.get("/similar", response_model=List[AssessmentResponse])
+async def similar(url: str, top_k: int = 6, intent: str = "balanced", catalog: Optional[str] = None):
+    """Assessments most similar to the one at `url`, from the precomputed neighbor table.
+
+    No model call; the same type-balancing quotas as /recommend apply for `intent`.
+    """
+    if intent not in rerank.INTENTS:
+        raise HTTPException(status_code=422, detail=f"intent must be one of {', '.join(rerank.INTENTS)}")
+
+    async with use_catalog(catalog) as catalog:
+        if catalog.neighbors is None:
+            raise HTTPException(status_code=404, detail="No neighbor table for this catalog; run embeddings_faiss.py")
+
+        # Matched by product slug, so /solutions/products/... URLs (as in train.csv) resolve too
+        idx = catalog.store.ids_by_slug.get(url_slug(url))
+        if idx is None:
+            raise HTTPException(status_code=404, detail="Unknown assessment url")
+
+        row = catalog.neighbors[idx]
+        ids = rerank_ids(row[row >= 0], catalog.store.type_codes, catalog.store.valid, intent, top_k)
+        return Response(content=catalog.store.render(ids), media_type="application/json")
+
+@app.get("/catalogs")
+def list_catalogs():
+    return {"catalogs": catalogs.names(), "loaded": catalogs.loaded(), **catalogs.stats}
+
+@app.post("/catalogs/{name}/recommend", response_model=List[AssessmentResponse])
+async def recommend_from_catalog(name: str, req: QueryRequest, request: Request):
+    req.catalog = name
+    return await recommend_assessments(req, request)
+
 @app.post("/recommend", response_model=List[AssessmentResponse])
-def recommend_assessments(req: QueryRequest):
-    return recommend(req.query, req.top_k)
+async def recommend_assessments(req: QueryRequest, request: Request):
+    deadline = time.monotonic() + REQUEST_DEADLINE_S
+    timer = StageTimer() if SERVER_TIMING else NULL_TIMER
+
+    if not req.query and not req.url:
+        raise HTTPException(status_code=422, detail="Provide a query or a url")
+
+    async with use_catalog(req.catalog) as catalog:
+        query = req.query or ""
+        if req.url:
+            try:
+                with timer.stage("fetch"):
+                    page_text = await jd_fetcher.fetch_text(req.url)
+            except UnsafeURL as e:
+                raise HTTPException(status_code=422, detail=str(e))
+            except FetchError as e:
+                raise HTTPException(status_code=502, detail=str(e))
+            query = f"{query}\n{page_text}" if query else page_text
+
+        queued = time.perf_counter()
+        async with admission.slot(deadline):
+            timer.add("queue", (time.perf_counter() - queued) * 1000)
+            if await request.is_disconnected():
+                return Response(status_code=499)
+            started = time.perf_counter()
+            ids = await run_in_threadpool(recommend, catalog, query, req.top_k, deadline, timer)
+            primary_ms = (time.perf_counter() - started) * 1000
+
+        if profile_session is not None:
+            profile_session["requests"] += 1
+        if shadow is not None and catalog.name == DEFAULT_CATALOG and shadow.sample():
+            shadow.offer(query, req.top_k, [catalog.store.urls[idx] for idx in ids], primary_ms)
+
+        # Fragments are pre-serialized, so skip response_model validation
+        response = Response(content=catalog.store.render(ids), media_type="application/json")
+        if timer.enabled:
+            response.headers["Server-Timing"] = timer.header()
+        return response
+
+
+def require_admin(request: Request):
+    if not ADMIN_TOKEN or request.headers.get("X-Admin-Token") != ADMIN_TOKEN:
+        raise HTTPException(status_code=404)
+
+@app.get("/admin/profile", response_class=PlainTextResponse)
+async def profile(request: Request, seconds: float = 10.0, requests: int = 0):
+    """Sample all threads for `seconds`, or until `requests` /recommend calls complete.
+
+    Returns collapsed stacks for flamegraph.pl / speedscope.
+    """
+    global profile_session
+    require_admin(request)
+    if profile_session is not None:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    seconds = min(seconds, 300.0)
+    profiler = SamplingProfiler()
+    profile_session = {"profiler": profiler, "requests": 0}
+    profiler.start()
+    try:
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            if requests and profile_session["requests"] >= requests:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        collapsed = profiler.stop()
+        profile_session = None
+
+    return PlainTextResponse(collapsed)
+
+@app.get("/admin/shadow")
+def shadow_summary(request: Request):
+    """Latency deltas and ranking agreement of the shadow candidate on sampled traffic."""
+    require_admin(request)
+    if shadow is None:
+        raise HTTPException(status_code=404, detail="Shadow mode is not enabled")
+    return shadow.summary()
+
+def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: Request, catalog: Optional[str] = None, top_k: int = 10):
+    """Upload a CSV with a `Query` column as the raw request body."""
+    async with use_catalog(catalog) as catalog:
+        name = catalog.name
+    try:
+        job = await jobs.submit(request.stream(), name, top_k)
+    except JobTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidUpload as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return job.progress()
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    return get_job(job_id).progress()
+
+@app.get("/jobs/{job_id}/events")
+def job_events(job_id: str):
+    return StreamingResponse(jobs.events(get_job(job_id)), media_type="text/event-stream")
+
+@app.get("/jobs/{job_id}/results")
+def job_results(job_id: str, format: str = "ndjson"):
+    """Stream results as they are produced; the response ends when the job does."""
+    job = get_job(job_id)
+    if format == "csv":
+        return StreamingResponse(
+            jobs.stream_csv(job),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{job.id}.csv"'},
+        )
+    if format != "ndjson":
+        raise HTTPException(status_code=422, detail="format must be ndjson or csv")
+    return StreamingResponse(jobs.stream_ndjson(job), media_type="application/x-ndjson")
@@ -0,0 +1,281 @@
+"""
+Offline scraper benchmark.
+
+Serves recorded fixtures from a local HTTP server, with configurable latency
+and error injection, and runs a scraper against it:
+  - catalog and category pages: debug_rendered_page.html (or --catalog-fixture)
+  - listing pages (?start=N&type=T): the same fixture with per-page product
+    slugs, so every page yields distinct assessments
+  - product pages (/view/<slug>/): <slug>.html from --product-dir if present,
+    otherwise a small synthetic page with a meta description
+Absolute shl.com links in the fixtures are rewritten to the local server, so
+nothing reaches the live site.
+
+Reports pages/sec, bytes fetched, time sleeping versus working, and parse
+time per page. The scraper target also reports its per-stage crawl timings
+(navigation, sleeps, scrolling, page.content(), parsing) and can write the
+per-page JSONL trace with --trace.
+
+Usage:
+    python bench_scraper.py --target listing --latency-ms 50 --error-rate 0.05
+    python bench_scraper.py --target scraper --sleep-scale 0   # needs Playwright
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from crawl_metrics import CrawlMetrics, percentile
+from fetch_scheduler import FetchScheduler
+
+_real_sleep = time.sleep
+
+START_RE = re.compile(r'[?&]start=(\d+)')
+VIEW_RE = re.compile(r'/products/product-catalog/view/([^/?#]+)')
+
+PRODUCT_TEMPLATE = """<html><head><title>{name}</title>
+<meta name="description" content="{name} measures job-relevant knowledge and skills for the role, with a detailed score report.">
+</head><body><main><h1>{name}</h1><p>Fixture product page.</p></main></body></html>"""
+
+
+class FixtureServer:
+    """Threaded local HTTP server for the recorded SHL pages."""
+
+    def __init__(self, catalog_fixture: str = "debug_rendered_page.html", product_dir: str = None,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, seed: int = 0):
+        with open(catalog_fixture, "r", encoding="utf-8") as f:
+            self.catalog_html = f.read()
+        self.product_dir = product_dir
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.requests = Counter()
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.base_url = f"http://127.0.0.1:{self._server.server_port}"
+
+    def _handler(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fixture.serve(self)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def body_for(self, path: str) -> bytes:
+        view = VIEW_RE.search(path)
+        if view:
+            slug = view.group(1)
+            saved = os.path.join(self.product_dir, f"{slug}.html") if self.product_dir else None
+            if saved and os.path.exists(saved):
+                with open(saved, "r", encoding="utf-8") as f:
+                    html = f.read()
+            else:
+                html = PRODUCT_TEMPLATE.format(name=slug.replace("-", " ").title())
+        else:
+            html = self.catalog_html
+            start = START_RE.search(path)
+            if start and int(start.group(1)):
+                html = html.replace("/products/product-catalog/view/",
+                                    f"/products/product-catalog/view/p{start.group(1)}-")
+        return html.replace("https://www.shl.com", self.base_url).encode("utf-8")
+
+    def serve(self, handler: BaseHTTPRequestHandler):
+        delay = self.latency_ms + (self.random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay:
+            _real_sleep(delay / 1000)
+
+        with self._lock:
+            fail = self.error_rate and self.random.random() < self.error_rate
+        if fail:
+            status, body = self.error_status, b""
+        else:
+            status, body = 200, self.body_for(handler.path)
+
+        handler.send_response(status)
+        handler.send_header("Content-Type", "text/html; charset=utf-8")
+        handler.send_header("Content-Length", str(len(body)))
+        if status in (429, 503):
+            handler.send_header("Retry-After", "0")
+        handler.end_headers()
+        handler.wfile.write(body)
+
+        with self._lock:
+            self.requests[status] += 1
+            self.bytes_sent += len(body)
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="fixture-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class SleepMeter:
+    """Counts requested sleep time; ``scale`` shortens (or skips, at 0) the real sleep."""
+
+    def __init__(self, scale: float = 1.0):
+        self.scale = scale
+        self.requested = 0.0
+        self._lock = threading.Lock()
+
+    def sleep(self, seconds: float):
+        with self._lock:
+            self.requested += seconds
+        if self.scale and seconds > 0:
+            _real_sleep(seconds * self.scale)
+
+    @contextmanager
+    def installed(self):
+        """Route ``time.sleep`` (fixed waits in the scrapers) through the meter."""
+        time.sleep = self.sleep
+        try:
+            yield self
+        finally:
+            time.sleep = _real_sleep
+
+
+def timed(obj, method: str, durations: list):
+    """Wrap ``obj.method`` so each call's duration (ms) is appended to ``durations``."""
+    original = getattr(obj, method)
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            durations.append((time.perf_counter() - start) * 1000)
+
+    setattr(obj, method, wrapper)
+
+
+def run_listing(base_url: str, meter: SleepMeter, workers: int, parse_ms: list) -> int:
+    from catalog_listing import CatalogListingFetcher
+
+    scheduler = FetchScheduler(initial_rate=20.0, max_rate=200.0, backoff_base=0.1, sleep=meter.sleep)
+    fetcher = CatalogListingFetcher(base_url, workers=workers, scheduler=scheduler)
+    timed(fetcher, "parse_page", parse_ms)
+    return len(fetcher.fetch_all())
+
+
+def run_scraper(base_url: str, meter: SleepMeter, min_assessments: int, parse_ms: list,
+                metrics: CrawlMetrics) -> int:
+    import scraper
+
+    if not scraper.PLAYWRIGHT_AVAILABLE:
+        raise SystemExit("The scraper target needs Playwright: pip install playwright && playwright install chromium")
+
+    class FixtureScraper(scraper.SHLScraper):
+        BASE_URL = base_url
+        CATALOG_URL = f"{base_url}/solutions/products/product-catalog/"
+
+    scheduler = FetchScheduler(initial_rate=20.0, max_rate=200.0, backoff_base=0.1, sleep=meter.sleep)
+    s = FixtureScraper(scheduler=scheduler, metrics=metrics)
+    s.scrape(min_assessments=min_assessments)
+    parse_ms.extend(metrics.stage_samples("parse"))
+    return s.assessment_count()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against local fixtures")
+    parser.add_argument("--target", choices=["listing", "scraper"], default="listing")
+    parser.add_argument("--catalog-fixture", default="debug_rendered_page.html")
+    parser.add_argument("--product-dir", help="Directory of saved product pages named <slug>.html")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--workers", type=int, default=8, help="Listing fetcher threads")
+    parser.add_argument("--min-assessments", type=int, default=377, help="Scraper stop target")
+    parser.add_argument("--sleep-scale", type=float, default=1.0,
+                        help="Multiply real sleeps (0 skips them but still counts them)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace", help="Scraper target: write per-page stage timings to this JSONL file")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    server = FixtureServer(args.catalog_fixture, args.product_dir, args.latency_ms, args.jitter_ms,
+                           args.error_rate, args.error_status, args.seed).start()
+    meter = SleepMeter(args.sleep_scale)
+    metrics = CrawlMetrics(args.trace)
+    parse_ms = []
+
+    try:
+        with meter.installed():
+            start = time.perf_counter()
+            if args.target == "listing":
+                items = run_listing(server.base_url, meter, args.workers, parse_ms)
+            else:
+                items = run_scraper(server.base_url, meter, args.min_assessments, parse_ms, metrics)
+            wall = time.perf_counter() - start
+    finally:
+        server.stop()
+        metrics.close()
+
+    pages = sum(server.requests.values())
+    # Sleep is summed over fetch threads, so compare it with thread time, not wall time
+    threads = args.workers if args.target == "listing" else 1
+    thread_s = wall * threads
+    report = {
+        "target": args.target,
+        "items": items,
+        "wall_s": round(wall, 3),
+        "pages": pages,
+        "status": dict(server.requests),
+        "pages_per_s": round(pages / wall, 2) if wall else 0.0,
+        "bytes": server.bytes_sent,
+        "sleep_s": round(meter.requested, 3),
+        "work_s": round(max(0.0, thread_s - meter.requested * args.sleep_scale), 3),
+        "threads": threads,
+        "parse_ms": {
+            "count": len(parse_ms),
+            "mean": round(sum(parse_ms) / len(parse_ms), 2) if parse_ms else 0.0,
+            "p50": round(percentile(parse_ms, 50), 2),
+            "p95": round(percentile(parse_ms, 95), 2),
+            "max": round(max(parse_ms), 2) if parse_ms else 0.0,
+        },
+    }
+    if metrics.pages:
+        report["crawl"] = metrics.summary()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"\n{'='*60}")
+    print(f"SCRAPER BENCHMARK ({args.target})")
+    print(f"{'='*60}")
+    print(f"Items found:      {items}")
+    print(f"Wall time:        {report['wall_s']:.2f}s")
+    print(f"Pages fetched:    {pages} {report['status']}")
+    print(f"Pages/sec:        {report['pages_per_s']:.2f}")
+    print(f"Bytes fetched:    {report['bytes']:,}")
+    print(f"Thread time:      {thread_s:.2f}s ({threads} threads)")
+    print(f"  sleeping:       {report['sleep_s']:.2f}s requested (scale {args.sleep_scale})")
+    print(f"  working:        {report['work_s']:.2f}s")
+    p = report["parse_ms"]
+    print(f"Parse per page:   mean {p['mean']:.1f}ms, p50 {p['p50']:.1f}ms, "
+          f"p95 {p['p95']:.1f}ms, max {p['max']:.1f}ms ({p['count']} pages)")
+    if metrics.pages:
+        print(metrics.format_summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Columnar catalog artifact shared by the scraper, index builder and API.
+
+The catalog is one Parquet file (shl_catalog.parquet) with a fixed string
+schema and a schema version in its metadata. The scrapers write it in row
+groups from their crawl store once a crawl has finished; embeddings_faiss.py
+reads only the text columns; the API reads only the columns it serves and
+copies them into a CatalogStore. shl_assessments.csv/.json are derived from
+it for people and older scripts.
+"""
+
+import csv
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from catalog_store import CatalogStore
+
+CATALOG_PATH = "shl_catalog.parquet"
+
+SCHEMA_VERSION = 1
+FIELDS = ['assessment_name', 'description', 'test_type', 'category', 'url']
+SCHEMA = pa.schema(
+    [(field, pa.string()) for field in FIELDS],
+    metadata={b"schema_version": str(SCHEMA_VERSION).encode()},
+)
+
+# Columns used by the embedding text and by the serving path
+TEXT_COLUMNS = ['assessment_name', 'description', 'category']
+STORE_COLUMNS = ['assessment_name', 'url', 'test_type', 'category']
+
+
+class CatalogArtifactError(Exception):
+    """Raised for a missing or incompatible catalog artifact."""
+
+
+class CatalogWriter:
+    """Streams assessments into a Parquet file, one row group per ``row_group_size`` rows.
+
+    Writes go to a temporary file that replaces ``path`` on close, so readers
+    never see a half-written catalog.
+    """
+
+    def __init__(self, path: str = CATALOG_PATH, row_group_size: int = 256):
+        self.path = path
+        self.row_group_size = row_group_size
+        self.count = 0
+        self._tmp_path = f"{path}.tmp"
+        self._writer = pq.ParquetWriter(self._tmp_path, SCHEMA)
+        self._buffer: List[Dict] = []
+
+    def write(self, assessment: Dict):
+        self._buffer.append(assessment)
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if self._buffer:
+            columns = {f: [a.get(f) for a in self._buffer] for f in FIELDS}
+            self._writer.write_table(pa.Table.from_pydict(columns, schema=SCHEMA))
+            self.count += len(self._buffer)
+            self._buffer = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._writer.close()
+        os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def write_catalog(assessments: Iterable[Dict], path: str = CATALOG_PATH, row_group_size: int = 256) -> int:
+    with CatalogWriter(path, row_group_size) as writer:
+        for a in assessments:
+            writer.write(a)
+    return writer.count
+
+
+def check_version(path: str):
+    if not os.path.exists(path):
+        raise CatalogArtifactError(f"Catalog artifact not found: {path}")
+    metadata = pq.read_schema(path).metadata or {}
+    version = int(metadata.get(b"schema_version", b"0"))
+    if version != SCHEMA_VERSION:
+        raise CatalogArtifactError(
+            f"{path} has catalog schema version {version}, expected {SCHEMA_VERSION}"
+        )
+
+
+def read_catalog(path: str = CATALOG_PATH, columns: Optional[List[str]] = None) -> pa.Table:
+    """Memory-mapped read of the requested columns only."""
+    check_version(path)
+    return pq.read_table(path, columns=columns, memory_map=True)
+
+
+def iter_catalog(path: str = CATALOG_PATH, batch_size: int = 1024) -> Iterator[Dict]:
+    """Stream rows as dicts without loading the whole file."""
+    check_version(path)
+    for batch in pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=batch_size):
+        yield from batch.to_pylist()
+
+
+def export_csv(csv_path: str = "shl_assessments.csv", path: str = CATALOG_PATH) -> int:
+    count = 0
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        for a in iter_catalog(path):
+            writer.writerow(a)
+            count += 1
+    return count
+
+
+def export_json(json_path: str = "shl_assessments.json", path: str = CATALOG_PATH) -> int:
+    count = 0
+    with open(json_path, 'w', encoding='utf-8') as f:
+        f.write("[")
+        for a in iter_catalog(path):
+            f.write(",\n  " if count else "\n  ")
+            f.write(json.dumps(a, ensure_ascii=False))
+            count += 1
+        f.write("\n]\n" if count else "]\n")
+    return count
+
+
+def rows_digest(rows: Iterable[Dict]) -> str:
+    """Order-sensitive hash of catalog rows; missing values and empty strings hash alike."""
+    digest = hashlib.sha1()
+    for row in rows:
+        digest.update(json.dumps([row.get(f) or "" for f in FIELDS], ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_store(path: str = CATALOG_PATH) -> CatalogStore:
+    """CatalogStore from the Parquet artifact."""
+    return CatalogStore.from_table(read_catalog(path, STORE_COLUMNS))
@@ -0,0 +1,205 @@
+"""
+Browserless SHL catalog listing fetcher.
+
+The catalog serves its tables server-side, paginated by ``start`` offset and
+``type`` (1 = Individual Test Solutions, 2 = Pre-packaged Job Solutions). This
+fetcher reads the first listing page, learns the page size and last offset
+from its pagination links, then fetches the remaining pages in parallel over
+a pooled HTTP session and parses the table rows directly. No Chromium needed.
+
+Usage:
+    python catalog_listing.py
+    python catalog_listing.py --base-url http://127.0.0.1:8001 --workers 8
+"""
+
+import argparse
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+from requests.adapters import HTTPAdapter
+
+import catalog_artifact
+from crawl_store import CrawlStore
+from fetch_scheduler import FetchFailed, FetchScheduler
+from scraper import SHLScraper
+
+logger = logging.getLogger(__name__)
+
+INDIVIDUAL_TEST_SOLUTIONS = 1
+PRE_PACKAGED_JOB_SOLUTIONS = 2
+
+LISTING_PATH = "/products/product-catalog/"
+START_RE = re.compile(r'[?&]start=(\d+)')
+
+# Only the listing tables and pagination lists are needed from each page
+LISTING_PARTS = SoupStrainer(['table', 'ul'])
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+class CatalogListingFetcher:
+    """Walks the catalog's paginated listing tables with a pooled HTTP client."""
+
+    def __init__(self, base_url: str = SHLScraper.BASE_URL, workers: int = 8, timeout: float = 30.0,
+                 scheduler: FetchScheduler = None, store: CrawlStore = None):
+        self.base_url = base_url.rstrip("/")
+        self.workers = workers
+        self.timeout = timeout
+        self.classifier = SHLScraper()
+        self.scheduler = scheduler or FetchScheduler(initial_rate=4.0, max_rate=20.0)
+        self.failed_pages: Dict[str, str] = {}
+        self.store = store
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = USER_AGENT
+
+    def listing_url(self, start: int, listing_type: int) -> str:
+        return f"{self.base_url}{LISTING_PATH}?start={start}&type={listing_type}"
+
+    def _get(self, url: str):
+        response = self.session.get(url, timeout=self.timeout)
+        return response.status_code, response
+
+    def fetch_page(self, start: int, listing_type: int) -> str:
+        response = self.scheduler.fetch(self.listing_url(start, listing_type), self._get)
+        response.raise_for_status()
+        return response.text
+
+    def parse_page(self, html: str, listing_type: int) -> Tuple[List[Dict], List[int]]:
+        """Parse one listing page. Returns (assessments, pagination start offsets)."""
+        soup = BeautifulSoup(html, 'html.parser', parse_only=LISTING_PARTS)
+        heading = "Individual Test Solutions" if listing_type == INDIVIDUAL_TEST_SOLUTIONS else "Pre-packaged Job Solutions"
+
+        assessments = []
+        for table in soup.find_all('table'):
+            header = table.find('th')
+            if not header or heading not in header.get_text():
+                continue
+
+            for row in table.find_all('tr'):
+                cells = row.find_all('td')
+                link = row.find('a', href=True)
+                if len(cells) < 4 or not link:
+                    continue
+
+                name = link.get_text(strip=True)
+                keys = "".join(k.get_text(strip=True) for k in cells[-1].find_all('span'))
+                test_type = self.classifier.extract_test_type(keys)
+                if not test_type:
+                    test_type = self.classifier.infer_test_type_from_name(name)
+
+                assessments.append({
+                    'assessment_name': name,
+                    'description': "No description available",
+                    'test_type': test_type,
+                    'category': keys,
+                    'url': urljoin(SHLScraper.BASE_URL, link['href']),
+                })
+
+        starts = []
+        for a in soup.select('ul.pagination a[href]'):
+            href = a['href']
+            if f"type={listing_type}" in href:
+                match = START_RE.search(href)
+                if match:
+                    starts.append(int(match.group(1)))
+
+        return assessments, starts
+
+    def _fetch_and_parse(self, start: int, listing_type: int) -> List[Dict]:
+        url = self.listing_url(start, listing_type)
+        try:
+            started = time.perf_counter()
+            html = self.fetch_page(start, listing_type)
+            if self.store is not None:
+                self.store.mark_fetched(url, (time.perf_counter() - started) * 1000, len(html))
+
+            started = time.perf_counter()
+            assessments, _ = self.parse_page(html, listing_type)
+            if self.store is not None:
+                self.store.add_assessments(assessments)
+                self.store.mark_parsed(url, (time.perf_counter() - started) * 1000)
+                return []
+            return assessments
+        except (FetchFailed, requests.RequestException) as e:
+            logger.error(f"Error fetching listing page start={start} type={listing_type}: {e}")
+            self.failed_pages[url] = str(e)
+            if self.store is not None:
+                self.store.mark_failed(url, str(e))
+            return []
+
+    def fetch_all(self, listing_type: int = INDIVIDUAL_TEST_SOLUTIONS) -> List[Dict]:
+        """Fetch every listing page of one type and return the deduplicated assessments.
+
+        With a store, assessments are streamed into it instead, pages already
+        parsed by an earlier run are skipped and an empty list is returned.
+        """
+        first, starts = self.parse_page(self.fetch_page(0, listing_type), listing_type)
+        positive = sorted(s for s in set(starts) if s > 0)
+        offsets = []
+        if positive:
+            page_size = positive[0]
+            offsets = list(range(page_size, max(positive) + 1, page_size))
+
+        if self.store is not None:
+            self.store.add_assessments(first)
+            self.store.enqueue([self.listing_url(s, listing_type) for s in offsets], 'listing')
+            pending = set(self.store.pending('listing'))
+            offsets = [s for s in offsets if self.listing_url(s, listing_type) in pending]
+            first = []
+
+        logger.info(f"Fetching {len(offsets)} more listing pages")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pages = list(pool.map(lambda s: self._fetch_and_parse(s, listing_type), offsets))
+
+        assessments = []
+        seen_urls = set()
+        for page in [first] + pages:
+            for assessment in page:
+                if assessment['url'] not in seen_urls:
+                    seen_urls.add(assessment['url'])
+                    assessments.append(assessment)
+        return assessments
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Fetch the SHL catalog from its paginated listing pages")
+    parser.add_argument("--base-url", default=SHLScraper.BASE_URL)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--db", help="SQLite crawl database; enables streaming output and resume")
+    args = parser.parse_args()
+
+    store = CrawlStore(args.db) if args.db else None
+    start = time.perf_counter()
+    fetcher = CatalogListingFetcher(args.base_url, workers=args.workers, store=store)
+    assessments = fetcher.fetch_all(INDIVIDUAL_TEST_SOLUTIONS)
+    elapsed = time.perf_counter() - start
+
+    scraper = SHLScraper(store=store)
+    scraper.assessments = assessments
+    scraper.save_to_parquet()
+    catalog_artifact.export_csv()
+    catalog_artifact.export_json()
+    total = scraper.assessment_count()
+    if store is not None:
+        store.close()
+
+    print(f"Total Individual Test Solutions: {total} in {elapsed:.1f}s")
+    print(f"Status: {'[OK]' if total >= 377 else '[INCOMPLETE]'}")
+    print(f"Pages failed after retries: {len(fetcher.failed_pages)}")
+    print(f"Fetch scheduler: {fetcher.scheduler.summary()}")
+
+
+if __name__ == "__main__":
+    main()
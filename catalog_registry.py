@@ -0,0 +1,215 @@
+"""
+Registry of servable catalogs.
+
+Each catalog (regional variant, client-specific subset, ...) is an index file
+plus metadata, optionally with an item-item similarity matrix and a
+precomputed neighbor table (for /similar). Catalogs are
+registered by name with their file paths only and loaded lazily on first use.
+A catalog may instead list index shards, which are then searched by worker
+processes (see shard_search.py).
+Loaded catalogs live in an LRU that is bounded by an approximate memory
+budget; the least recently used ones are evicted when it is exceeded. The
+encoder is not part of a catalog and is shared by all of them.
+
+Loading happens outside the registry lock (concurrent requests for the same
+catalog wait on one shared future), and request handlers hold a reference
+(``acquire``/``release`` or ``using``) so an evicted catalog is only closed
+once its last in-flight request is done with it.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import faiss
+import numpy as np
+
+from catalog_artifact import load_store
+from shard_search import ShardedIndex
+from suggest import SuggestIndex
+
+DEFAULT_CATALOG = "default"
+
+logger = logging.getLogger(__name__)
+
+
+class UnknownCatalog(KeyError):
+    """Raised when a catalog name has not been registered."""
+
+
+class Catalog:
+    """One loaded catalog: FAISS index, compact metadata, name autocomplete and optional extras."""
+
+    def __init__(self, name: str, index_path: str, metadata_path: str,
+                 similarity_path: Optional[str] = None, shards: Optional[List[str]] = None,
+                 shard_timeout: float = 0.5, neighbors_path: Optional[str] = None):
+        self.name = name
+        if shards:
+            self.index = ShardedIndex(shards, timeout=shard_timeout)
+            index_bytes = sum(os.path.getsize(path) for path in shards)
+        else:
+            self.index = faiss.read_index(index_path)
+            index_bytes = os.path.getsize(index_path)
+
+        # Parquet catalog artifact (catalog_artifact.py)
+        self.store = load_store(metadata_path)
+        self.passages = [f"{name} {category}" for name, category in zip(self.store.names, self.store.categories)]
+        self.suggest = SuggestIndex(self.store.names)
+
+        self.similarity = None
+        if similarity_path and os.path.exists(similarity_path):
+            # Memory-mapped: pages are shared through the OS cache, not counted below
+            self.similarity = np.load(similarity_path, mmap_mode="r")
+        elif similarity_path:
+            logger.warning(f"{similarity_path} not found; MMR diversification is off for catalog '{name}' "
+                           "(run embeddings_faiss.py)")
+
+        # Top-k neighbor ids per item, -1 padded (embeddings_faiss.py)
+        self.neighbors = None
+        neighbors_bytes = 0
+        if neighbors_path and os.path.exists(neighbors_path):
+            self.neighbors = np.load(neighbors_path)
+            neighbors_bytes = self.neighbors.nbytes
+
+        self.nbytes = index_bytes + neighbors_bytes + 4 * os.path.getsize(metadata_path)
+
+        # Maintained by CatalogRegistry under its lock
+        self.refs = 0
+        self.evicted = False
+
+    def __len__(self):
+        return len(self.store)
+
+    def close(self):
+        if isinstance(self.index, ShardedIndex):
+            self.index.close()
+
+
+class CatalogRegistry:
+    """Lazily loaded, memory-budgeted LRU of catalogs."""
+
+    def __init__(self, memory_budget_bytes: int = 512 * 1024 * 1024, load_similarity: bool = False,
+                 shard_timeout: float = 0.5):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.load_similarity = load_similarity
+        self.shard_timeout = shard_timeout
+        self._specs: Dict[str, Dict] = {}
+        self._loaded: "OrderedDict[str, Catalog]" = OrderedDict()
+        # name -> Future of a load in progress
+        self._loading: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"loads": 0, "evictions": 0}
+
+    def register(self, name: str, index: str, metadata: str, similarity: Optional[str] = None,
+                 shards: Optional[List[str]] = None, neighbors: Optional[str] = None):
+        self._specs[name] = {"index": index, "metadata": metadata, "similarity": similarity, "shards": shards,
+                             "neighbors": neighbors}
+
+    def register_file(self, path: str):
+        """Register catalogs from a JSON file:
+        {"name": {"index": ..., "metadata": ..., "similarity": ..., "shards": [...], "neighbors": ...}}.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            for name, spec in json.load(f).items():
+                self.register(name, spec.get("index"), spec["metadata"], spec.get("similarity"),
+                              spec.get("shards"), spec.get("neighbors"))
+
+    def names(self) -> List[str]:
+        return sorted(self._specs)
+
+    def loaded(self) -> List[str]:
+        return list(self._loaded)
+
+    def acquire_loaded(self, name: str) -> Optional[Catalog]:
+        """Take a reference to the catalog if it is resident, without loading anything."""
+        with self._lock:
+            catalog = self._loaded.get(name)
+            if catalog is not None:
+                self._loaded.move_to_end(name)
+                catalog.refs += 1
+            return catalog
+
+    def acquire(self, name: str) -> Catalog:
+        """Take a reference to a catalog, loading it (and evicting others) as needed.
+
+        Every acquire must be paired with release().
+        """
+        while True:
+            with self._lock:
+                catalog = self._loaded.get(name)
+                if catalog is not None:
+                    self._loaded.move_to_end(name)
+                    catalog.refs += 1
+                    return catalog
+
+                spec = self._specs.get(name)
+                if spec is None:
+                    raise UnknownCatalog(name)
+
+                future = self._loading.get(name)
+                if future is None:
+                    future = self._loading[name] = Future()
+                    break
+            # Another thread is loading it; wait, then take a reference as usual
+            future.result()
+
+        try:
+            catalog = Catalog(
+                name, spec["index"], spec["metadata"],
+                spec["similarity"] if self.load_similarity else None,
+                shards=spec["shards"], shard_timeout=self.shard_timeout,
+                neighbors_path=spec["neighbors"],
+            )
+        except BaseException as e:
+            with self._lock:
+                del self._loading[name]
+            future.set_exception(e)
+            raise
+
+        to_close = []
+        with self._lock:
+            del self._loading[name]
+            self.stats["loads"] += 1
+            catalog.refs += 1
+            self._loaded[name] = catalog
+
+            # Evict least recently used catalogs, never the one just loaded
+            while len(self._loaded) > 1 and self._used_bytes() > self.memory_budget_bytes:
+                _, evicted = self._loaded.popitem(last=False)
+                evicted.evicted = True
+                self.stats["evictions"] += 1
+                if evicted.refs == 0:
+                    to_close.append(evicted)
+        future.set_result(catalog)
+
+        for evicted in to_close:
+            evicted.close()
+        return catalog
+
+    def release(self, catalog: Catalog):
+        with self._lock:
+            catalog.refs -= 1
+            close = catalog.evicted and catalog.refs == 0
+        if close:
+            catalog.close()
+
+    @contextmanager
+    def using(self, name: str):
+        catalog = self.acquire(name)
+        try:
+            yield catalog
+        finally:
+            self.release(catalog)
+
+    def get(self, name: str) -> Catalog:
+        """Return a loaded catalog without holding a reference (startup, reporting)."""
+        with self.using(name) as catalog:
+            return catalog
+
+    def _used_bytes(self) -> int:
+        return sum(c.nbytes for c in self._loaded.values())
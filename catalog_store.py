@@ -0,0 +1,74 @@
+"""
+Compact, array-backed view of the assessment metadata.
+
+Everything the request path needs is computed once at load time: test type
+codes, the "not a report" validity mask used by reranking, and each
+assessment's JSON response fragment pre-encoded as bytes. A response is then
+assembled by joining cached fragments.
+"""
+
+import json
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from rerank import TYPE_CODES, TYPE_OTHER, is_valid_name
+
+
+def url_slug(url: str) -> str:
+    """train.csv and the catalog use different URL prefixes; compare by product slug."""
+    return url.rstrip("/").rsplit("/view/", 1)[-1]
+
+
+class CatalogStore:
+    """Array-backed assessment metadata with pre-serialized response fragments."""
+
+    def __init__(self, records: List[Dict]):
+        self._build(
+            [r["assessment_name"] for r in records],
+            [r["url"] for r in records],
+            [r["test_type"] for r in records],
+            [r.get("category", "") for r in records],
+        )
+
+    @classmethod
+    def from_table(cls, table) -> "CatalogStore":
+        """Build from a pyarrow Table with the catalog artifact's columns."""
+        store = cls.__new__(cls)
+        store._build(*(table.column(c).to_pylist() for c in ("assessment_name", "url", "test_type", "category")))
+        return store
+
+    def _build(self, names, urls, test_types, categories):
+        self.names = tuple(names)
+        self.urls = tuple(urls)
+        self.test_types = tuple(test_types)
+        self.categories = tuple(c or "" for c in categories)
+        self.ids_by_slug = {url_slug(url): i for i, url in enumerate(self.urls)}
+
+        self.type_codes = np.array(
+            [TYPE_CODES.get(t, TYPE_OTHER) for t in self.test_types], dtype=np.int8
+        )
+        self.valid = np.array([is_valid_name(n) for n in self.names], dtype=bool)
+
+        self.fragments = tuple(
+            json.dumps(
+                {"assessment_name": name, "url": url, "test_type": test_type},
+                ensure_ascii=False,
+            ).encode("utf-8")
+            for name, url, test_type in zip(self.names, self.urls, self.test_types)
+        )
+
+    def __len__(self):
+        return len(self.names)
+
+    def record(self, idx: int) -> Dict:
+        """Return the response dict for one assessment."""
+        return {
+            "assessment_name": self.names[idx],
+            "url": self.urls[idx],
+            "test_type": self.test_types[idx],
+        }
+
+    def render(self, ids: Sequence[int]) -> bytes:
+        """Serialize the given assessments as a JSON array."""
+        return b"[" + b",".join([self.fragments[i] for i in ids]) + b"]"
@@ -0,0 +1,248 @@
+"""
+Per-page and per-stage crawl timing.
+
+The scraper wraps each page visit in ``metrics.page(url, kind)`` and each step
+inside it in ``metrics.stage(name)``:
+
+    navigate  page.goto through the fetch scheduler (includes rate-limit waits;
+              also counts the response body bytes)
+    sleep     fixed waits for JavaScript and lazy loading
+    scroll    page.evaluate scroll calls
+    content   page.content() DOM serialization
+    parse     BeautifulSoup parsing and extraction
+
+Each finished page is written as one JSON line to the trace file (if any).
+Finished pages are folded into running totals, fixed-size reservoir samples
+(for percentiles) and a short list of the slowest pages, so memory stays
+bounded however long the crawl runs; ``summary()`` reports from those.
+"""
+
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+STAGES = ["navigate", "sleep", "scroll", "content", "parse"]
+
+
+def percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+class Reservoir:
+    """Exact count, total and max of a stream of values, plus a uniform sample of
+    at most ``size`` of them (reservoir sampling) for percentiles.
+    """
+
+    def __init__(self, size: int = 1024, seed: int = 0):
+        self.size = size
+        self.samples: List[float] = []
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._random = random.Random(seed)
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        if len(self.samples) < self.size:
+            self.samples.append(value)
+        else:
+            j = self._random.randrange(self.count)
+            if j < self.size:
+                self.samples[j] = value
+
+
+class PageRecord:
+    def __init__(self, url: str, kind: str):
+        self.url = url
+        self.kind = kind
+        self.started_at = time.time()
+        self.total_ms = 0.0
+        self.stages: Dict[str, float] = defaultdict(float)
+        self.bytes = 0
+        self.items = 0
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "url": self.url,
+            "kind": self.kind,
+            "started_at": round(self.started_at, 3),
+            "total_ms": round(self.total_ms, 2),
+            "stages": {name: round(ms, 2) for name, ms in self.stages.items()},
+            "bytes": self.bytes,
+            "items": self.items,
+            "error": self.error,
+        }
+
+
+class CrawlMetrics:
+    """Aggregates page records and writes an optional JSONL trace."""
+
+    def __init__(self, trace_path: Optional[str] = None, sample_size: int = 1024, keep_slowest: int = 20):
+        self.trace_path = trace_path
+        self.sample_size = sample_size
+        self.keep_slowest = keep_slowest
+        self.pages = 0
+        self.bytes = 0
+        self.page_ms = Reservoir(sample_size)
+        self.stage_ms: Dict[str, Reservoir] = {}
+        self.kinds: Dict[str, Dict] = defaultdict(lambda: {"pages": 0, "total_s": 0.0, "bytes": 0, "errors": 0})
+        # Min-heap of (total_ms, seq, record dict) holding the slowest pages
+        self._slowest: List = []
+        self._seq = itertools.count()
+        # Stage time spent outside any page (e.g. between visits)
+        self.unattributed: Dict[str, float] = defaultdict(float)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._trace = open(trace_path, "w", encoding="utf-8") if trace_path else None
+        self._started = time.perf_counter()
+
+    @property
+    def current(self) -> Optional[PageRecord]:
+        return getattr(self._local, "page", None)
+
+    @contextmanager
+    def page(self, url: str, kind: str):
+        record = PageRecord(url, kind)
+        outer = self.current
+        self._local.page = record
+        started = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record.error = str(e)
+            raise
+        finally:
+            record.total_ms = (time.perf_counter() - started) * 1000
+            self._local.page = outer
+            self._finish(record)
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            record = self.current
+            if record is not None:
+                record.stages[name] += elapsed
+            else:
+                with self._lock:
+                    self.unattributed[name] += elapsed
+
+    def add_bytes(self, n: int):
+        record = self.current
+        if record is not None:
+            record.bytes += n
+
+    def add_items(self, n: int):
+        record = self.current
+        if record is not None:
+            record.items += n
+
+    def stage_samples(self, name: str) -> List[float]:
+        """Sampled per-page durations (ms) of one stage."""
+        with self._lock:
+            reservoir = self.stage_ms.get(name)
+            return list(reservoir.samples) if reservoir else []
+
+    def _finish(self, record: PageRecord):
+        with self._lock:
+            self.pages += 1
+            self.bytes += record.bytes
+            self.page_ms.add(record.total_ms)
+            for name, ms in record.stages.items():
+                if name not in self.stage_ms:
+                    self.stage_ms[name] = Reservoir(self.sample_size)
+                self.stage_ms[name].add(ms)
+
+            kind = self.kinds[record.kind]
+            kind["pages"] += 1
+            kind["total_s"] += record.total_ms / 1000
+            kind["bytes"] += record.bytes
+            kind["errors"] += record.error is not None
+
+            entry = (record.total_ms, next(self._seq), record.to_dict())
+            if len(self._slowest) < self.keep_slowest:
+                heapq.heappush(self._slowest, entry)
+            elif entry[0] > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+            if self._trace is not None:
+                self._trace.write(json.dumps(record.to_dict()) + "\n")
+                self._trace.flush()
+
+    def close(self):
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
+
+    # ---------- reporting ----------
+
+    def summary(self, slowest: int = 5) -> Dict:
+        with self._lock:
+            page_ms = self.page_ms
+            stage_ms = {name: (r.total, list(r.samples), r.max) for name, r in self.stage_ms.items()}
+            unattributed = dict(self.unattributed)
+            kinds = {kind: dict(k, total_s=round(k["total_s"], 3)) for kind, k in self.kinds.items()}
+            slowest_pages = [d for _, _, d in heapq.nlargest(slowest, self._slowest)]
+            report = {
+                "wall_s": round(time.perf_counter() - self._started, 3),
+                "pages": self.pages,
+                "bytes": self.bytes,
+                "page_ms": {
+                    "p50": round(percentile(page_ms.samples, 50), 2),
+                    "p95": round(percentile(page_ms.samples, 95), 2),
+                    "max": round(page_ms.max, 2),
+                },
+            }
+            total_ms = page_ms.total
+
+        stage_names = STAGES + sorted((set(stage_ms) | set(unattributed)) - set(STAGES))
+        stages = {}
+        for name in stage_names:
+            in_pages, values, max_ms = stage_ms.get(name, (0.0, [], 0.0))
+            spent = in_pages + unattributed.get(name, 0.0)
+            if not spent:
+                continue
+            stages[name] = {
+                "total_s": round(spent / 1000, 3),
+                "share": round(spent / total_ms, 4) if total_ms else 0.0,
+                "p50_ms": round(percentile(values, 50), 2),
+                "p95_ms": round(percentile(values, 95), 2),
+                "max_ms": round(max_ms, 2),
+            }
+
+        report.update({"kinds": kinds, "stages": stages, "slowest": slowest_pages})
+        return report
+
+    def format_summary(self, slowest: int = 5) -> str:
+        s = self.summary(slowest)
+        lines = [
+            f"Crawl timing: {s['pages']} pages, {s['bytes']:,} bytes, {s['wall_s']:.1f}s wall "
+            f"(page p50 {s['page_ms']['p50']:.0f}ms, p95 {s['page_ms']['p95']:.0f}ms)",
+        ]
+        for kind, k in sorted(s["kinds"].items()):
+            lines.append(f"  {kind:<10} {k['pages']:>5} pages {k['total_s']:>9.1f}s "
+                         f"{k['bytes']:>12,} bytes {k['errors']:>3} errors")
+        for name, st in s["stages"].items():
+            lines.append(f"  {name:<10} {st['total_s']:>9.1f}s {st['share']:>6.1%}  "
+                         f"p50 {st['p50_ms']:.0f}ms p95 {st['p95_ms']:.0f}ms max {st['max_ms']:.0f}ms")
+        if s["slowest"]:
+            lines.append("  slowest pages:")
+            for p in s["slowest"]:
+                top = max(p["stages"].items(), key=lambda kv: kv[1])[0] if p["stages"] else "-"
+                lines.append(f"    {p['total_ms']:>9.0f}ms ({top}) {p['url']}")
+        return "\n".join(lines)
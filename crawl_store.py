@@ -0,0 +1,264 @@
+"""
+SQLite-backed crawl frontier and result store.
+
+Records every URL the scraper visits with its state (queued, fetched, parsed,
+failed), attempt count and timings, and streams parsed assessments to disk in
+batched transactions. An interrupted crawl can be resumed by reopening the
+same database: parsed URLs are skipped and assessments already stored are not
+fetched again. Nothing grows in memory with the size of the catalog.
+
+The store is shared by fetcher threads. Buffered rows are swapped out under a
+short lock and written outside it, and a page is only marked parsed once every
+batch buffered before it has been committed.
+"""
+
+import csv
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+QUEUED = "queued"
+FETCHED = "fetched"
+PARSED = "parsed"
+FAILED = "failed"
+
+ASSESSMENT_FIELDS = ['assessment_name', 'description', 'test_type', 'category', 'url']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    url TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    queued_at REAL,
+    fetched_at REAL,
+    parsed_at REAL,
+    fetch_ms REAL,
+    parse_ms REAL,
+    bytes INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS frontier_kind_state ON frontier (kind, state);
+CREATE TABLE IF NOT EXISTS assessments (
+    url TEXT PRIMARY KEY,
+    assessment_name TEXT NOT NULL,
+    description TEXT,
+    test_type TEXT,
+    category TEXT,
+    added_at REAL
+);
+"""
+
+
+class CrawlStore:
+    """Persistent crawl frontier plus batched assessment writer."""
+
+    def __init__(self, path: str = "crawl.sqlite3", batch_size: int = 50):
+        self.path = path
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        # _db_lock serializes use of the connection; _lock guards the write buffer
+        self._db_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._flushed = threading.Condition(self._lock)
+        self._pending: Dict[str, tuple] = {}
+        # Rows taken from the buffer whose batch is not committed yet
+        self._inflight: Dict[str, tuple] = {}
+        self._batch_seq = 0
+        self._batches_in_flight: Set[int] = set()
+        self._count = self.conn.execute("SELECT COUNT(*) FROM assessments").fetchone()[0]
+
+    # ---------- frontier ----------
+
+    def enqueue(self, urls: Iterable[str], kind: str):
+        """Queue URLs that are not known yet."""
+        now = time.time()
+        with self._db_lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO frontier (url, kind, state, queued_at) VALUES (?, ?, ?, ?)",
+                [(url, kind, QUEUED, now) for url in urls],
+            )
+
+    def state(self, url: str) -> Optional[str]:
+        with self._db_lock:
+            row = self.conn.execute("SELECT state FROM frontier WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def is_parsed(self, url: str) -> bool:
+        return self.state(url) == PARSED
+
+    def pending(self, kind: str, max_attempts: int = 3) -> List[str]:
+        """URLs of ``kind`` still to do: queued, fetched but not parsed, or failed with attempts left."""
+        with self._db_lock:
+            rows = self.conn.execute(
+                "SELECT url FROM frontier WHERE kind = ? AND state != ? AND attempts < ? ORDER BY queued_at",
+                (kind, PARSED, max_attempts),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def mark_fetched(self, url: str, fetch_ms: float, nbytes: Optional[int] = None):
+        with self._db_lock, self.conn:
+            self.conn.execute(
+                "UPDATE frontier SET state = ?, attempts = attempts + 1, fetched_at = ?, "
+                "fetch_ms = ?, bytes = ?, error = NULL WHERE url = ?",
+                (FETCHED, time.time(), fetch_ms, nbytes, url),
+            )
+
+    def mark_parsed(self, url: str, parse_ms: float):
+        # A parsed page must never have assessments that only live in memory,
+        # including rows another thread has taken from the buffer but not committed
+        self.flush()
+        self._wait_flushed()
+        with self._db_lock, self.conn:
+            self.conn.execute(
+                "UPDATE frontier SET state = ?, parsed_at = ?, parse_ms = ? WHERE url = ?",
+                (PARSED, time.time(), parse_ms, url),
+            )
+
+    def mark_failed(self, url: str, error: str):
+        with self._db_lock, self.conn:
+            self.conn.execute(
+                "UPDATE frontier SET state = ?, error = ?, "
+                "attempts = attempts + (CASE WHEN state = ? THEN 0 ELSE 1 END) WHERE url = ?",
+                (FAILED, error, FETCHED, url),
+            )
+
+    def state_counts(self) -> Dict[str, int]:
+        with self._db_lock:
+            rows = self.conn.execute("SELECT state, COUNT(*) FROM frontier GROUP BY state").fetchall()
+        return dict(rows)
+
+    # ---------- assessments ----------
+
+    def has_assessment(self, url: str) -> bool:
+        with self._lock:
+            return self._known(url)
+
+    def _known(self, url: str) -> bool:
+        # Caller holds self._lock
+        if url in self._pending or url in self._inflight:
+            return True
+        with self._db_lock:
+            row = self.conn.execute("SELECT 1 FROM assessments WHERE url = ?", (url,)).fetchone()
+        return row is not None
+
+    def add_assessments(self, assessments: Iterable[Dict]) -> int:
+        """Buffer new assessments, writing them in batches. Returns how many were new."""
+        new_count = 0
+        with self._lock:
+            for a in assessments:
+                if self._known(a['url']):
+                    continue
+                self._pending[a['url']] = (
+                    a['url'], a['assessment_name'], a.get('description'),
+                    a.get('test_type'), a.get('category'), time.time(),
+                )
+                new_count += 1
+            self._count += new_count
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+        return new_count
+
+    def update_assessment(self, url: str, **fields):
+        self.flush()
+        self._wait_flushed()
+        columns = [f for f in fields if f in ASSESSMENT_FIELDS and f != 'url']
+        if not columns:
+            return
+        with self._db_lock, self.conn:
+            self.conn.execute(
+                f"UPDATE assessments SET {', '.join(f'{c} = ?' for c in columns)} WHERE url = ?",
+                [fields[c] for c in columns] + [url],
+            )
+
+    def flush(self):
+        """Write buffered assessments in one transaction.
+
+        The buffer is swapped out under the lock, so other threads keep adding
+        rows while the batch is written.
+        """
+        with self._lock:
+            if not self._pending:
+                return
+            rows, self._pending = self._pending, {}
+            self._inflight.update(rows)
+            self._batch_seq += 1
+            seq = self._batch_seq
+            self._batches_in_flight.add(seq)
+
+        try:
+            with self._db_lock, self.conn:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO assessments "
+                    "(url, assessment_name, description, test_type, category, added_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    list(rows.values()),
+                )
+        except Exception:
+            with self._lock:
+                # Put the rows back so a later flush retries them
+                for url, row in rows.items():
+                    self._pending.setdefault(url, row)
+            raise
+        finally:
+            with self._flushed:
+                for url in rows:
+                    self._inflight.pop(url, None)
+                self._batches_in_flight.discard(seq)
+                self._flushed.notify_all()
+
+    def _wait_flushed(self):
+        """Block until every batch taken from the buffer so far is committed."""
+        with self._flushed:
+            target = self._batch_seq
+            self._flushed.wait_for(lambda: not any(seq <= target for seq in self._batches_in_flight))
+
+    def count_assessments(self) -> int:
+        return self._count
+
+    def iter_assessments(self, where: str = "", params: tuple = (), limit: int = -1) -> Iterator[Dict]:
+        """Stream stored assessments in insertion order."""
+        self.flush()
+        self._wait_flushed()
+        cursor = self.conn.execute(
+            f"SELECT {', '.join(ASSESSMENT_FIELDS)} FROM assessments {where} ORDER BY rowid LIMIT ?",
+            params + (limit,),
+        )
+        for row in cursor:
+            yield dict(zip(ASSESSMENT_FIELDS, row))
+
+    def export_csv(self, filename: str, keep=lambda a: True) -> int:
+        count = 0
+        with open(filename, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=ASSESSMENT_FIELDS)
+            writer.writeheader()
+            for a in self.iter_assessments():
+                if keep(a):
+                    writer.writerow(a)
+                    count += 1
+        return count
+
+    def export_json(self, filename: str, keep=lambda a: True) -> int:
+        """Write a JSON array without materializing the whole list."""
+        count = 0
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write("[")
+            for a in self.iter_assessments():
+                if keep(a):
+                    f.write(",\n  " if count else "\n  ")
+                    f.write(json.dumps(a, ensure_ascii=False))
+                    count += 1
+            f.write("\n]\n" if count else "]\n")
+        return count
+
+    def close(self):
+        self.flush()
+        self._wait_flushed()
+        self.conn.close()
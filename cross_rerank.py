@@ -0,0 +1,104 @@
+"""
+Optional cross-encoder re-ranking stage.
+
+Scores the FAISS candidates against the query with a small cross-encoder in a
+single batched forward pass and reorders them by score. The stage runs under
+a per-request time budget: if the estimated cost of scoring the uncached
+pairs does not fit in what is left of the budget, the candidates are returned
+in FAISS order. Each skip decays the latency estimate a little, so a spike
+(or a slow warm-up) cannot disable the stage for good: it eventually runs
+again and re-measures. Pair scores are cached by (catalog, query hash,
+assessment id); the cache is shared by the request threads and locked.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import List
+
+from sentence_transformers import CrossEncoder
+
+# Weight of the newest observation in the per-pair latency estimate
+EWMA_ALPHA = 0.2
+
+# Factor applied to the per-pair estimate each time the stage is skipped
+SKIP_DECAY = 0.9
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha1(query.encode("utf-8")).hexdigest()
+
+
+class CrossEncoderStage:
+    """Budgeted cross-encoder re-ranker with a pair-score cache."""
+
+    def __init__(self, model_name: str, budget_ms: float = 150.0, cache_size: int = 50000):
+        self.model = CrossEncoder(model_name)
+        self.budget_ms = budget_ms
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[tuple, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"runs": 0, "skipped": 0, "pairs_scored": 0, "cache_hits": 0}
+
+        # The first call pays one-off initialization; discard it, then seed the
+        # latency estimate from a warm call so the first request can be budgeted
+        self.model.predict([("warm up", "warm up")] * 4)
+        start = time.perf_counter()
+        self.model.predict([("warm up", "warm up")] * 4)
+        self.ms_per_pair = (time.perf_counter() - start) * 1000 / 4
+
+    def _remember(self, key, score: float):
+        # Caller holds self._lock
+        self._cache[key] = score
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def rerank(self, query: str, ids: List[int], passages: List[str], started: float,
+               namespace: str = "") -> List[int]:
+        """Reorder candidate ids by cross-encoder score.
+
+        ``started`` is the ``time.perf_counter()`` value at which the request
+        began; the stage is skipped if it cannot finish within the budget.
+        ``namespace`` keeps cached scores of different catalogs apart, since
+        ids are only unique within a catalog.
+        """
+        qh = (namespace, query_hash(query))
+        scores = {}
+        missing = []
+        with self._lock:
+            for idx in ids:
+                score = self._cache.get((qh, idx))
+                if score is None:
+                    missing.append(idx)
+                else:
+                    self._cache.move_to_end((qh, idx))
+                    scores[idx] = score
+            self.stats["cache_hits"] += len(ids) - len(missing)
+
+        if missing:
+            remaining_ms = self.budget_ms - (time.perf_counter() - started) * 1000
+            if self.ms_per_pair * len(missing) > remaining_ms:
+                with self._lock:
+                    self.stats["skipped"] += 1
+                    self.ms_per_pair *= SKIP_DECAY
+                return list(ids)
+
+            start = time.perf_counter()
+            predicted = self.model.predict(
+                [(query, passages[idx]) for idx in missing],
+                batch_size=len(missing),
+            )
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            with self._lock:
+                self.ms_per_pair = (1 - EWMA_ALPHA) * self.ms_per_pair + EWMA_ALPHA * elapsed_ms / len(missing)
+                self.stats["pairs_scored"] += len(missing)
+                for idx, score in zip(missing, predicted):
+                    scores[idx] = float(score)
+                    self._remember((qh, idx), float(score))
+
+        with self._lock:
+            self.stats["runs"] += 1
+        # sorted() is stable, so ties keep their FAISS order
+        return sorted(ids, key=lambda idx: scores[idx], reverse=True)
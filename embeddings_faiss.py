@@ -1,40 +1,171 @@
-import pandas as pd
+import argparse
+import csv
+import glob
+import os
+
 import numpy as np
 import faiss
 import pickle
 from sentence_transformers import SentenceTransformer
 
-# Load data
-df = pd.read_csv("shl_assessments.csv")
+from catalog_artifact import (
+    CATALOG_PATH, STORE_COLUMNS, TEXT_COLUMNS, iter_catalog, read_catalog, rows_digest, write_catalog,
+)
+
+PROJECTIONS = ("none", "pca", "opq")
+
+# OPQ trains a product quantizer with 256 centroids per sub-space
+OPQ_MIN_TRAIN = 256
+
+# Neighbors kept per item for GET /similar (before type balancing)
+NEIGHBORS_K = 30
+
 
 # Combine text fields
 def build_text(row):
-    return f"{row['assessment_name']} {row.get('description','')} {row.get('category','')}"
+    return f"{row['assessment_name']} {row.get('description') or ''} {row.get('category') or ''}"
+
+
+def ensure_catalog_artifact(csv_path="shl_assessments.csv"):
+    """Create the Parquet catalog from the CSV export if it is missing, or if the
+    CSV was edited after the artifact was written and no longer matches it.
+    """
+    if os.path.exists(CATALOG_PATH):
+        if not os.path.exists(csv_path) or os.path.getmtime(csv_path) <= os.path.getmtime(CATALOG_PATH):
+            return
+        # The scrapers export the CSV right after the artifact, so newer alone is not enough
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            if rows_digest(csv.DictReader(f)) == rows_digest(iter_catalog(CATALOG_PATH)):
+                return
+        print(f"{csv_path} is newer than {CATALOG_PATH} and differs from it")
+
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        count = write_catalog(csv.DictReader(f), CATALOG_PATH)
+    print(f"Converted {csv_path} to {CATALOG_PATH} ({count} rows)")
+
+
+def opq_subspaces(dim):
+    return next(m for m in (16, 8, 4, 2, 1) if dim % m == 0)
+
+
+def build_index(embeddings, dim=None, projection="none"):
+    """Flat L2 index, optionally behind a learned PCA/OPQ projection to `dim` dimensions.
+
+    The projection is stored inside the index (IndexPreTransform), so queries
+    are projected by index.search and the API needs no changes.
+    """
+    d = embeddings.shape[1]
+    if projection == "none" or not dim or dim >= d:
+        index = faiss.IndexFlatL2(d)
+        index.add(embeddings)
+        return index
+
+    if projection == "opq" and len(embeddings) < OPQ_MIN_TRAIN:
+        print(f"OPQ needs at least {OPQ_MIN_TRAIN} vectors to train, got {len(embeddings)}; using PCA")
+        projection = "pca"
+
+    if projection == "pca" and dim > len(embeddings):
+        # PCA has at most one component per training vector
+        print(f"PCA can keep at most {len(embeddings)} dims with {len(embeddings)} vectors")
+        dim = len(embeddings)
+
+    if projection == "opq":
+        transform = faiss.OPQMatrix(d, opq_subspaces(dim), dim)
+    else:
+        transform = faiss.PCAMatrix(d, dim)
+
+    index = faiss.IndexPreTransform(transform, faiss.IndexFlatL2(dim))
+    index.train(embeddings)
+    index.add(embeddings)
+    print(f"Projected {d} -> {dim} dims with {projection.upper()}")
+    return index
+
+
+def build_shards(embeddings, n_shards, dim=None, projection="none"):
+    """Split the catalog round-robin into `n_shards` IndexIDMap shards that keep global ids.
+
+    The projection (if any) is trained once on the whole catalog and shared,
+    so distances from different shards are comparable when merged.
+    """
+    trained = build_index(embeddings, dim, projection)
+    shards = []
+    for s in range(n_shards):
+        ids = np.arange(s, len(embeddings), n_shards)
+        shard = faiss.clone_index(trained)
+        shard.reset()
+        shard = faiss.IndexIDMap(shard)
+        shard.add_with_ids(embeddings[ids], ids.astype("int64"))
+        shards.append(shard)
+    return shards
+
+
+def build_neighbors(index, embeddings, k=NEIGHBORS_K):
+    """Top-k neighbor ids of every catalog item, from one batched search of the index.
+
+    The item itself is dropped; rows are padded with -1 when the catalog has
+    fewer than k other items.
+    """
+    n = len(embeddings)
+    _, I = index.search(embeddings, min(k + 1, n))
+    neighbors = np.full((n, k), -1, dtype=np.int32)
+    for i, row in enumerate(I):
+        row = row[(row >= 0) & (row != i)][:k]
+        neighbors[i, :len(row)] = row
+    return neighbors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f"Build the FAISS index and metadata from {CATALOG_PATH}")
+    parser.add_argument("--dim", type=int, default=None, help="Target dimension for --projection")
+    parser.add_argument("--projection", choices=PROJECTIONS, default="none")
+    parser.add_argument("--shards", type=int, default=0, help="Also write N index shards for shard_search.py")
+    parser.add_argument("--neighbors", type=int, default=NEIGHBORS_K, help="Neighbors per item for GET /similar")
+    args = parser.parse_args()
+
+    # Load data: only the text columns are read from the catalog artifact
+    ensure_catalog_artifact()
+    texts = [build_text(row) for row in read_catalog(CATALOG_PATH, TEXT_COLUMNS).to_pylist()]
+
+    # Load embedding model
+    model = SentenceTransformer("all-MiniLM-L6-v2")
+
+    print("Generating embeddings...")
+    embeddings = model.encode(texts, show_progress_bar=True)
+
+    # Convert to float32 for FAISS
+    embeddings = np.array(embeddings).astype("float32")
+
+    # Create FAISS index
+    index = build_index(embeddings, args.dim, args.projection)
 
-texts = df.apply(build_text, axis=1).tolist()
+    print(f"Total embeddings indexed: {index.ntotal}")
 
-# Load embedding model
-model = SentenceTransformer("all-MiniLM-L6-v2")
+    # Save index
+    faiss.write_index(index, "shl_faiss.index")
 
-print("Generating embeddings...")
-embeddings = model.encode(texts, show_progress_bar=True)
+    # Shards for scatter-gather search (INDEX_SHARDS in api.py); stale ones are removed
+    for path in glob.glob("shl_faiss.shard*.index"):
+        os.remove(path)
+    if args.shards > 1:
+        for i, shard in enumerate(build_shards(embeddings, args.shards, args.dim, args.projection)):
+            faiss.write_index(shard, f"shl_faiss.shard{i}.index")
+        print(f"Wrote {args.shards} index shards")
 
-# Convert to float32 for FAISS
-embeddings = np.array(embeddings).astype("float32")
+    # Save item-item cosine similarity for MMR diversification (memory-mapped by the API)
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    similarity = (normalized @ normalized.T).astype("float16")
+    np.save("shl_similarity.npy", similarity)
 
-# Create FAISS index
-dimension = embeddings.shape[1]
-index = faiss.IndexFlatL2(dimension)
-index.add(embeddings)
+    # Item-item neighbor table for GET /similar, searched through the index just built
+    np.save("shl_neighbors.npy", build_neighbors(index, embeddings, args.neighbors))
 
-print(f"Total embeddings indexed: {index.ntotal}")
+    # Legacy metadata pickle for the evaluation scripts; the API reads the artifact
+    metadata = read_catalog(CATALOG_PATH, STORE_COLUMNS).to_pylist()
+    with open("metadata.pkl", "wb") as f:
+        pickle.dump(metadata, f)
 
-# Save index
-faiss.write_index(index, "shl_faiss.index")
+    print("FAISS index and metadata saved successfully.")
 
-# Save metadata
-metadata = df[["assessment_name", "url", "test_type", "category"]].to_dict(orient="records")
-with open("metadata.pkl", "wb") as f:
-    pickle.dump(metadata, f)
 
-print("FAISS index and metadata saved successfully.")
+if __name__ == "__main__":
+    main()
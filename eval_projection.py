@@ -0,0 +1,83 @@
+"""
+Recall / latency / size trade-off of projected (PCA, OPQ) indexes on train.csv.
+
+Catalog and train query embeddings are computed once. Then one index is built
+per (projection, dimension) with the same code as embeddings_faiss.py, and
+each is reported with:
+  - FAISS Recall@10 against the train.csv ground truth
+  - overlap@10 with the full-dimension index
+  - mean search latency per query
+  - serialized index size
+
+Usage:
+    python eval_projection.py --dims 256 128 64 32 --projections pca opq
+"""
+
+import argparse
+import time
+
+import faiss
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from catalog_artifact import TEXT_COLUMNS, load_store, read_catalog
+from embeddings_faiss import build_index, build_text, ensure_catalog_artifact
+from tune_rerank import load_train
+
+TOP_K = 10
+
+
+def timed_search(index, queries, k, repeats=20):
+    """Mean per-query latency in microseconds, searching one query at a time like the API."""
+    index.search(queries[:1], k)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for q in queries:
+            _, I = index.search(q[None, :], k)
+    elapsed = time.perf_counter() - start
+    return elapsed / (repeats * len(queries)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report recall/latency of projected indexes on train.csv")
+    parser.add_argument("--dims", type=int, nargs="+", default=[256, 128, 64, 32])
+    parser.add_argument("--projections", nargs="+", choices=["pca", "opq"], default=["pca", "opq"])
+    args = parser.parse_args()
+
+    ensure_catalog_artifact()
+    store = load_store()
+    queries, relevance = load_train(store)
+    if not queries:
+        print("No overlapping ground-truth URLs found. Nothing to evaluate.")
+        return
+
+    model = SentenceTransformer("all-MiniLM-L6-v2")
+    texts = [build_text(row) for row in read_catalog(columns=TEXT_COLUMNS).to_pylist()]
+    embeddings = model.encode(texts, batch_size=64).astype("float32")
+    q_emb = model.encode(queries, batch_size=64).astype("float32")
+    k = min(TOP_K, len(embeddings))
+
+    configs = [("none", embeddings.shape[1])] + [(p, d) for p in args.projections for d in args.dims]
+    baseline = None
+
+    print(f"{len(queries)} train queries, {len(embeddings)} catalog items\n")
+    print(f"{'projection':<11}{'dim':>5}{'recall@10':>11}{'overlap@10':>12}{'us/query':>10}{'bytes':>10}")
+    for projection, dim in configs:
+        index = build_index(embeddings, dim, projection)
+        _, I = index.search(q_emb, k)
+        if baseline is None:
+            baseline = I
+
+        hits = np.take_along_axis(relevance, I, axis=1).sum(axis=1)
+        recall = float((hits / relevance.sum(axis=1)).mean())
+        overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(I, baseline)])
+        latency = timed_search(index, q_emb, k)
+        size = faiss.serialize_index(index).nbytes
+        # build_index may clamp the dimension or fall back to PCA on small catalogs
+        dim = index.index.d if isinstance(index, faiss.IndexPreTransform) else index.d
+
+        print(f"{projection:<11}{dim:>5}{recall:>11.3f}{overlap:>12.3f}{latency:>10.1f}{size:>10}")
+
+
+if __name__ == "__main__":
+    main()
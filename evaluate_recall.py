@@ -1,8 +1,10 @@
+import os
 import pandas as pd
 import faiss
 import pickle
 import numpy as np
 from sentence_transformers import SentenceTransformer
+import rerank
 from rerank import infer_intent, rerank_results
 
 # ===============================
@@ -15,6 +17,9 @@ with open("metadata.pkl", "rb") as f:
 
 model = SentenceTransformer("all-MiniLM-L6-v2")
 
+# Tuned quotas / keywords / depth written by tune_rerank.py, if present (as in the API)
+rerank.load_config(os.getenv("RERANK_CONFIG", "rerank_config.json"))
+
 # Build set of URLs available in our scraped dataset
 available_urls = set([m["url"] for m in metadata])
 
@@ -26,8 +31,8 @@ def recommend(query, top_k=10):
     # Encode query
     q_emb = model.encode([query]).astype("float32")
 
-    # FAISS search
-    _, I = index.search(q_emb, top_k)
+    # FAISS search over the configured candidate depth
+    _, I = index.search(q_emb, min(rerank.CANDIDATE_DEPTH, index.ntotal))
 
     # Collect FAISS results
     faiss_results = []
@@ -0,0 +1,202 @@
+"""
+Shared fetch scheduler for the scrapers.
+
+Every fetch goes through a per-host token bucket whose rate is adjusted with
+AIMD: it grows additively while responses are fast and healthy, and is cut
+multiplicatively on 429/5xx responses, errors or slow responses. Failed
+fetches are retried with jittered exponential backoff, and a per-host circuit
+breaker stops hammering a host that keeps failing.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class FetchFailed(Exception):
+    """Raised when a URL could not be fetched after all retries."""
+
+
+class CircuitOpenError(FetchFailed):
+    """Raised when a host's circuit breaker is open."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket with an adjustable refill rate."""
+
+    def __init__(self, rate: float, capacity: float = 1.0, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.sleep = sleep
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until it is available. Returns the time slept."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures; allows one trial after ``reset_timeout``."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Half-open: let one trial request through
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class HostState:
+    def __init__(self, rate: float, sleep, failure_threshold: int, reset_timeout: float):
+        self.bucket = TokenBucket(rate, sleep=sleep)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0, "failed": 0, "slept": 0.0}
+
+
+class FetchScheduler:
+    """Per-host rate limiting, AIMD rate adjustment, retries and circuit breaking."""
+
+    def __init__(self, initial_rate: float = 1.0, min_rate: float = 0.2, max_rate: float = 10.0,
+                 increase: float = 0.25, decrease: float = 0.5, slow_latency: float = 5.0,
+                 max_retries: int = 3, backoff_base: float = 1.0, backoff_max: float = 30.0,
+                 failure_threshold: int = 5, reset_timeout: float = 60.0,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_latency = slow_latency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.sleep = sleep
+        self._hosts: Dict[str, HostState] = {}
+        self._lock = threading.Lock()
+
+    def host(self, url: str) -> HostState:
+        name = urlparse(url).netloc
+        with self._lock:
+            if name not in self._hosts:
+                self._hosts[name] = HostState(
+                    self.initial_rate, self.sleep, self.failure_threshold, self.reset_timeout
+                )
+            return self._hosts[name]
+
+    def _adjust(self, state: HostState, healthy: bool):
+        bucket = state.bucket
+        if healthy:
+            bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+        else:
+            bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+
+    def _backoff(self, attempt: int, retry_after=None) -> float:
+        if retry_after is not None:
+            return min(self.backoff_max, retry_after)
+        # Full jitter
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def fetch(self, url: str, do_fetch: Callable[[str], Tuple[int, Any]]) -> Any:
+        """Fetch ``url`` with ``do_fetch(url) -> (status, result)`` and return the result.
+
+        Raises FetchFailed after ``max_retries`` retries and CircuitOpenError
+        while the host's breaker is open. Non-retryable statuses (e.g. 404)
+        are returned to the caller as-is.
+        """
+        state = self.host(url)
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if not state.breaker.allow():
+                raise CircuitOpenError(f"Circuit open for {urlparse(url).netloc}")
+
+            state.stats["slept"] += state.bucket.acquire()
+            state.stats["requests"] += 1
+            if attempt:
+                state.stats["retries"] += 1
+
+            start = time.monotonic()
+            retry_after = None
+            try:
+                status, result = do_fetch(url)
+            except Exception as e:
+                status, result, last_error = None, None, e
+            latency = time.monotonic() - start
+
+            if status is not None and status not in RETRYABLE_STATUS:
+                state.breaker.record_success()
+                self._adjust(state, healthy=latency < self.slow_latency)
+                return result
+
+            if status is not None:
+                state.stats["throttled"] += status == 429
+                last_error = f"HTTP {status}"
+                retry_after = _retry_after(result)
+
+            state.breaker.record_failure()
+            self._adjust(state, healthy=False)
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt, retry_after)
+                logger.info(f"Retrying {url} in {delay:.1f}s after {last_error}")
+                state.stats["slept"] += delay
+                self.sleep(delay)
+
+        state.stats["failed"] += 1
+        raise FetchFailed(f"Giving up on {url} after {self.max_retries + 1} attempts: {last_error}")
+
+    def summary(self) -> Dict[str, Dict]:
+        """Per-host request counters and current rate."""
+        return {
+            name: dict(state.stats, rate=round(state.bucket.rate, 3))
+            for name, state in self._hosts.items()
+        }
+
+
+def _retry_after(result):
+    """Read a numeric Retry-After header from a requests or Playwright response."""
+    headers = getattr(result, "headers", None) or {}
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
@@ -5,6 +5,25 @@ import os
 # Use environment variable for API URL in production, fallback to localhost for local dev
 API_BASE_URL = os.getenv("API_URL", "http://127.0.0.1:8000")
 API_URL = f"{API_BASE_URL}/recommend"
+SUGGEST_URL = f"{API_BASE_URL}/suggest"
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_suggestions(prefix):
+    try:
+        response = requests.get(SUGGEST_URL, params={"prefix": prefix, "limit": 8}, timeout=2)
+        return response.json() if response.status_code == 200 else []
+    except requests.RequestException:
+        return []
+
+
+def suggestions_for(prefix):
+    """Autocomplete for the current prefix; repeated prefixes are served from the cache."""
+    prefix = prefix.strip().lower()
+    if len(prefix) < 2:
+        return []
+    return fetch_suggestions(prefix)
+
 
 st.set_page_config(
     page_title="SHL Assessment Recommender",
@@ -17,22 +36,39 @@ st.markdown(
     "Enter a job description or hiring requirement to get recommended SHL assessments."
 )
 
+name_prefix = st.text_input(
+    "Find an assessment by name",
+    placeholder="e.g. acc, java, verbal"
+)
+
+for s in suggestions_for(name_prefix):
+    st.markdown(f"- [{s['assessment_name']}]({s['url']}) `{s['test_type']}`")
+
 query = st.text_area(
     "Job Description / Query",
     height=150,
     placeholder="e.g. Java backend developer with good communication skills"
 )
 
+jd_url = st.text_input(
+    "...or Job Description URL",
+    placeholder="https://example.com/careers/java-developer"
+)
+
 top_k = st.slider("Number of recommendations", 3, 10, 6)
 
 if st.button("🔍 Get Recommendations"):
-    if not query.strip():
-        st.warning("Please enter a job description.")
+    if not query.strip() and not jd_url.strip():
+        st.warning("Please enter a job description or a URL.")
     else:
         with st.spinner("Fetching recommendations..."):
             response = requests.post(
                 API_URL,
-                json={"query": query, "top_k": top_k},
+                json={
+                    "query": query.strip() or None,
+                    "url": jd_url.strip() or None,
+                    "top_k": top_k
+                },
                 timeout=30
             )
 
@@ -53,5 +89,8 @@ if st.button("🔍 Get Recommendations"):
                             unsafe_allow_html=True
                         )
                         st.divider()
+        elif response.status_code in (429, 503):
+            retry_after = response.headers.get("Retry-After", "a few")
+            st.warning(f"The service is busy. Please try again in {retry_after} seconds.")
         else:
             st.error("API error. Make sure FastAPI server is running.")
@@ -1,8 +1,10 @@
+import os
 import pandas as pd
 import faiss
 import pickle
 import numpy as np
 from sentence_transformers import SentenceTransformer
+import rerank
 from rerank import infer_intent, rerank_results
 
 # Load FAISS + metadata
@@ -12,9 +14,12 @@ with open("metadata.pkl", "rb") as f:
 
 model = SentenceTransformer("all-MiniLM-L6-v2")
 
+# Tuned quotas / keywords / depth written by tune_rerank.py, if present (as in the API)
+rerank.load_config(os.getenv("RERANK_CONFIG", "rerank_config.json"))
+
 def recommend(query, top_k=10):
     q_emb = model.encode([query]).astype("float32")
-    _, I = index.search(q_emb, top_k)
+    _, I = index.search(q_emb, min(rerank.CANDIDATE_DEPTH, index.ntotal))
 
     results = []
     for idx in I[0]:
@@ -0,0 +1,281 @@
+"""
+Background bulk-scoring jobs.
+
+A job is a CSV of queries uploaded to the service. The upload is spooled to
+disk as it arrives, and a single worker thread scores the rows in large
+encode/search batches, appending one NDJSON line per query to the job's result
+file. Neither the input nor the results are held in memory, so clients can
+follow progress and download results while the job is still running.
+
+The worker backs off while interactive requests are in flight (``is_busy``), so
+bulk jobs only use capacity that /recommend is not using. Finished jobs, and
+their files, are forgotten once they are older than ``ttl`` seconds.
+"""
+
+import asyncio
+import codecs
+import csv
+import io
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+SUBMISSION_FIELDS = ["Query", "Assessment_url"]
+
+
+class JobTooLarge(Exception):
+    """Raised when an upload exceeds the configured size limit."""
+
+
+class InvalidUpload(ValueError):
+    """Raised when an upload is not a readable UTF-8 CSV."""
+
+
+class Job:
+    def __init__(self, job_id: str, work_dir: str, catalog: str, top_k: int):
+        self.id = job_id
+        self.catalog = catalog
+        self.top_k = top_k
+        self.input_path = os.path.join(work_dir, f"{job_id}.csv")
+        self.output_path = os.path.join(work_dir, f"{job_id}.ndjson")
+        self.status = QUEUED
+        self.total = 0
+        self.processed = 0
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def progress(self) -> Dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "catalog": self.catalog,
+            "total": self.total,
+            "processed": self.processed,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def read_queries(path: str):
+    """Stream queries from the ``Query`` column (or the first column) of a CSV."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        column = header.index("Query") if "Query" in header else 0
+        for row in reader:
+            if len(row) > column and row[column].strip():
+                yield row[column]
+
+
+def count_queries(path: str) -> int:
+    return sum(1 for _ in read_queries(path))
+
+
+class JobManager:
+    """Spools uploads, runs jobs one at a time on a worker thread, and tails results.
+
+    ``score_batch(catalog, queries, top_k)`` returns one list of result dicts
+    (``assessment_name``, ``url``, ``test_type``) per query.
+    """
+
+    def __init__(self, score_batch: Callable[[str, List[str], int], List[List[Dict]]],
+                 work_dir: str = "jobs", batch_size: int = 64,
+                 is_busy: Callable[[], bool] = lambda: False,
+                 max_upload_bytes: int = 50 * 1024 * 1024, poll_interval: float = 0.05,
+                 ttl: float = 24 * 3600):
+        self.score_batch = score_batch
+        self.work_dir = work_dir
+        self.batch_size = batch_size
+        self.is_busy = is_busy
+        self.max_upload_bytes = max_upload_bytes
+        self.poll_interval = poll_interval
+        self.ttl = ttl
+        self.jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Job]" = queue.Queue()
+        self._thread = None
+        os.makedirs(work_dir, exist_ok=True)
+
+    def start(self):
+        if self._thread is None:
+            self.expire()
+            self._thread = threading.Thread(target=self._run, name="bulk-jobs", daemon=True)
+            self._thread.start()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    # ---------- expiry ----------
+
+    def expire(self):
+        """Drop finished jobs older than the TTL, and files no job refers to (e.g. from before a restart)."""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [job for job in self.jobs.values() if job.finished and job.finished_at < cutoff]
+            for job in expired:
+                del self.jobs[job.id]
+            live = {job.id for job in self.jobs.values()}
+
+        for name in os.listdir(self.work_dir):
+            path = os.path.join(self.work_dir, name)
+            if os.path.splitext(name)[0] in live:
+                continue
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    # ---------- submission ----------
+
+    async def submit(self, chunks: AsyncIterator[bytes], catalog: str, top_k: int) -> Job:
+        """Spool an uploaded CSV body to disk and queue the job.
+
+        Raises JobTooLarge or InvalidUpload; nothing is left on disk on failure.
+        """
+        job = Job(uuid.uuid4().hex, self.work_dir, catalog, top_k)
+        size = 0
+        # Validate UTF-8 as the body arrives, so the worker never meets a bad byte
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        try:
+            with open(job.input_path, "wb") as f:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.max_upload_bytes:
+                        raise JobTooLarge(f"Upload exceeds {self.max_upload_bytes} bytes")
+                    decoder.decode(chunk)
+                    f.write(chunk)
+                decoder.decode(b"", final=True)
+
+            # One streaming pass so progress can be reported as a fraction
+            job.total = await asyncio.to_thread(count_queries, job.input_path)
+        except UnicodeDecodeError:
+            os.remove(job.input_path)
+            raise InvalidUpload("Upload is not valid UTF-8")
+        except csv.Error as e:
+            os.remove(job.input_path)
+            raise InvalidUpload(f"Upload is not a readable CSV: {e}")
+        except BaseException:
+            # Size limit, client disconnect, cancellation
+            if os.path.exists(job.input_path):
+                os.remove(job.input_path)
+            raise
+        open(job.output_path, "wb").close()
+
+        with self._lock:
+            self.jobs[job.id] = job
+        self._queue.put(job)
+        return job
+
+    # ---------- worker ----------
+
+    def _run(self):
+        while True:
+            try:
+                job = self._queue.get(timeout=min(self.ttl, 600))
+            except queue.Empty:
+                self.expire()
+                continue
+            job.status = RUNNING
+            try:
+                self._process(job)
+                job.status = DONE
+            except Exception as e:
+                logger.exception(f"Job {job.id} failed")
+                job.error = str(e)
+                job.status = FAILED
+            job.finished_at = time.time()
+            self.expire()
+
+    def _process(self, job: Job):
+        with open(job.output_path, "a", encoding="utf-8") as out:
+            batch = []
+            for query in read_queries(job.input_path):
+                batch.append(query)
+                if len(batch) >= self.batch_size:
+                    self._score_into(job, batch, out)
+                    batch = []
+            if batch:
+                self._score_into(job, batch, out)
+
+    def _score_into(self, job: Job, batch: List[str], out):
+        # Yield to interactive traffic before taking the encoder
+        while self.is_busy():
+            time.sleep(self.poll_interval)
+
+        results = self.score_batch(job.catalog, batch, job.top_k)
+        out.write("".join(
+            json.dumps({"query": q, "recommendations": recs}, ensure_ascii=False) + "\n"
+            for q, recs in zip(batch, results)
+        ))
+        out.flush()
+        job.processed += len(batch)
+
+    # ---------- streaming ----------
+
+    async def events(self, job: Job, interval: float = 0.5) -> AsyncIterator[str]:
+        """Server-sent progress events until the job finishes."""
+        last = None
+        while True:
+            progress = job.progress()
+            if progress != last:
+                yield f"data: {json.dumps(progress)}\n\n"
+                last = progress
+            if job.finished:
+                return
+            await asyncio.sleep(interval)
+
+    async def _tail(self, job: Job) -> AsyncIterator[str]:
+        """Yield complete result lines, following the file until the job finishes."""
+        with open(job.output_path, "r", encoding="utf-8") as f:
+            while True:
+                # Check before reading so nothing written before the job finished is missed
+                finished = job.finished
+                position = f.tell()
+                line = f.readline()
+                if line.endswith("\n"):
+                    yield line
+                    continue
+                f.seek(position)
+                if finished:
+                    return
+                await asyncio.sleep(self.poll_interval)
+
+    async def stream_ndjson(self, job: Job) -> AsyncIterator[str]:
+        async for line in self._tail(job):
+            yield line
+
+    async def stream_csv(self, job: Job) -> AsyncIterator[str]:
+        """Results in the final_submission.csv layout: one row per (query, url)."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(SUBMISSION_FIELDS)
+        async for line in self._tail(job):
+            row = json.loads(line)
+            for rec in row["recommendations"]:
+                writer.writerow([row["query"], rec["url"]])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
@@ -0,0 +1,97 @@
+"""
+Long job-description handling.
+
+MiniLM only sees the first ``max_seq_length`` word pieces of its input, so a
+full job description is mostly ignored. This module splits long text into
+overlapping token-bounded chunks, encodes every chunk in a single batch and
+either pools the chunk vectors into one query vector or searches them as a
+multi-vector query whose result lists are fused.
+"""
+
+import numpy as np
+
+POOLING_MODES = ("mean", "max", "multi")
+
+# Rough upper bound on characters per word piece, used to cut the raw text
+# before tokenization so that tokenizing stays bounded by the token budget.
+CHARS_PER_TOKEN = 8
+
+# Reciprocal rank fusion constant (Cormack et al.)
+RRF_K = 60
+
+
+def split_into_chunks(tokenizer, text: str, max_tokens: int, overlap: int, token_budget: int):
+    """Split text into overlapping chunks of at most ``max_tokens`` word pieces.
+
+    Only the first ``token_budget`` word pieces are considered. Returns the
+    original text unchanged when it already fits in a single chunk.
+    """
+    text = text[:token_budget * CHARS_PER_TOKEN]
+    ids = tokenizer(
+        text,
+        add_special_tokens=False,
+        truncation=True,
+        max_length=token_budget,
+    )["input_ids"]
+
+    if len(ids) <= max_tokens:
+        return [text]
+
+    stride = max(1, max_tokens - overlap)
+    chunks = []
+    for start in range(0, len(ids), stride):
+        chunks.append(tokenizer.decode(ids[start:start + max_tokens]))
+        if start + max_tokens >= len(ids):
+            break
+    return chunks
+
+
+def encode_chunks(model, text: str, overlap: int = 32, token_budget: int = 1024):
+    """Encode all chunks of ``text`` in one batch. Returns an (n_chunks, dim) array."""
+    # Leave room for the [CLS] and [SEP] tokens the model adds itself
+    max_tokens = model.max_seq_length - 2
+    chunks = split_into_chunks(model.tokenizer, text, max_tokens, overlap, token_budget)
+    return model.encode(chunks, batch_size=len(chunks)).astype("float32")
+
+
+def pool_chunks(chunk_embs, pooling: str = "mean"):
+    """Pool chunk embeddings into a single unit-length (1, dim) query vector."""
+    if len(chunk_embs) == 1:
+        return chunk_embs
+
+    if pooling == "max":
+        pooled = chunk_embs.max(axis=0)
+    else:
+        pooled = chunk_embs.mean(axis=0)
+
+    norm = np.linalg.norm(pooled)
+    if norm > 0:
+        pooled = pooled / norm
+    return pooled[None, :].astype("float32")
+
+
+def search_multi_vector(index, chunk_embs, k: int):
+    """Search every chunk vector and fuse the result lists with reciprocal rank fusion."""
+    _, I = index.search(chunk_embs, k)
+
+    scores = {}
+    for row in I:
+        for rank, idx in enumerate(row):
+            if idx < 0:
+                continue
+            scores[idx] = scores.get(idx, 0.0) + 1.0 / (RRF_K + rank + 1)
+
+    ranked = sorted(scores, key=lambda idx: scores[idx], reverse=True)
+    return np.array(ranked[:k], dtype="int64")
+
+
+def search_long_query(model, index, text: str, k: int, pooling: str = "mean",
+                      overlap: int = 32, token_budget: int = 1024):
+    """Encode ``text`` in chunks and return the top-k catalog ids."""
+    chunk_embs = encode_chunks(model, text, overlap, token_budget)
+
+    if pooling == "multi" and len(chunk_embs) > 1:
+        return search_multi_vector(index, chunk_embs, k)
+
+    _, I = index.search(pool_chunks(chunk_embs, pooling), k)
+    return I[0]
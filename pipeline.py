@@ -0,0 +1,272 @@
+"""
+Incremental refresh pipeline.
+
+Runs the refresh scripts as stages with declared inputs and outputs:
+
+    scrape -> index -> evaluate
+                    -> submission
+
+A stage is skipped when the content hashes of its inputs (including its own
+code) match the last successful run and its outputs are unchanged on disk.
+File hashes are cached by size and mtime, so a no-op refresh does not re-read
+anything. Stages whose dependencies are done run in parallel, so evaluation
+and submission generation overlap.
+
+Naming stages selects them together with everything upstream (run only if
+out of date) and everything downstream (run if an upstream stage re-ran or
+they are out of date). Scraping hits the live site, so the scrape stage only
+runs when it is named explicitly or when the catalog artifact does not exist
+yet.
+
+Usage:
+    python pipeline.py                  # index, evaluate, submission as needed
+    python pipeline.py scrape           # re-crawl, then refresh everything downstream
+    python pipeline.py --force evaluate # re-run one stage even if up to date
+    python pipeline.py --dry-run
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
+STATE_PATH = ".pipeline_state.json"
+LOG_DIR = "pipeline_logs"
+
+CATALOG_CODE = ["catalog_artifact.py", "catalog_store.py", "rerank.py"]
+
+
+class Stage:
+    def __init__(self, name: str, cmd: List[str], inputs: List[str], outputs: List[str],
+                 stdout: Optional[str] = None, explicit: bool = False):
+        self.name = name
+        self.cmd = cmd
+        self.inputs = inputs
+        self.outputs = outputs
+        # Output file that receives the command's stdout (reports)
+        self.stdout = stdout
+        # Only run when requested by name or when an output is missing
+        self.explicit = explicit
+
+
+STAGES = [
+    Stage("scrape", ["scraper.py"],
+          inputs=["scraper.py", "crawl_store.py", "fetch_scheduler.py"] + CATALOG_CODE,
+          outputs=["shl_catalog.parquet", "shl_assessments.csv", "shl_assessments.json"],
+          explicit=True),
+    Stage("index", ["embeddings_faiss.py"],
+          inputs=["embeddings_faiss.py", "shl_catalog.parquet"] + CATALOG_CODE,
+          outputs=["shl_faiss.index", "shl_similarity.npy", "shl_neighbors.npy", "metadata.pkl"]),
+    Stage("evaluate", ["evaluate_recall.py"],
+          inputs=["evaluate_recall.py", "rerank.py", "rerank_config.json", "shl_faiss.index", "metadata.pkl",
+                  "train.csv"],
+          outputs=["recall_report.txt"], stdout="recall_report.txt"),
+    Stage("submission", ["generate_submission.py"],
+          inputs=["generate_submission.py", "rerank.py", "rerank_config.json", "shl_faiss.index", "metadata.pkl",
+                  "test.csv"],
+          outputs=["final_submission.csv"]),
+]
+
+
+class FileHasher:
+    """sha256 of file contents, cached by (size, mtime_ns) across runs."""
+
+    def __init__(self, cache: Dict[str, Dict]):
+        self.cache = cache
+
+    def hash(self, path: str) -> Optional[str]:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        cached = self.cache.get(path)
+        if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+            return cached["sha256"]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        self.cache[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest.hexdigest()}
+        return digest.hexdigest()
+
+
+def load_state() -> Dict:
+    if os.path.exists(STATE_PATH):
+        with open(STATE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {"files": {}, "stages": {}}
+
+
+def save_state(state: Dict):
+    tmp = f"{STATE_PATH}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, STATE_PATH)
+
+
+def fingerprint(stage: Stage, hasher: FileHasher) -> str:
+    digest = hashlib.sha256(json.dumps(stage.cmd).encode())
+    for path in sorted(stage.inputs):
+        digest.update(f"{path}\0{hasher.hash(path)}\n".encode())
+    return digest.hexdigest()
+
+
+def is_current(stage: Stage, state: Dict, hasher: FileHasher) -> bool:
+    previous = state["stages"].get(stage.name)
+    if not previous or previous["fingerprint"] != fingerprint(stage, hasher):
+        return False
+    # Outputs must still be the ones that run produced
+    return all(hasher.hash(path) == previous["outputs"].get(path) for path in stage.outputs)
+
+
+def dependencies(stages: List[Stage]) -> Dict[str, List[str]]:
+    producer = {out: s.name for s in stages for out in s.outputs}
+    return {s.name: sorted({producer[i] for i in s.inputs if i in producer and producer[i] != s.name})
+            for s in stages}
+
+
+def run_stage(stage: Stage) -> float:
+    os.makedirs(LOG_DIR, exist_ok=True)
+    started = time.perf_counter()
+    with open(os.path.join(LOG_DIR, f"{stage.name}.log"), "w", encoding="utf-8") as log:
+        stdout = open(stage.stdout, "w", encoding="utf-8") if stage.stdout else log
+        try:
+            subprocess.run([sys.executable] + stage.cmd, stdout=stdout, stderr=log, check=True,
+                           env=dict(os.environ, PYTHONIOENCODING="utf-8"))
+        finally:
+            if stage.stdout:
+                stdout.close()
+    return time.perf_counter() - started
+
+
+def is_forced(stage: Stage, requested: List[str], force: bool) -> bool:
+    # An explicit stage reads the live site, which its input hashes cannot see
+    if stage.name in requested and stage.explicit:
+        return True
+    return force and (not requested or stage.name in requested)
+
+
+def plan(requested: List[str], force: bool, state: Dict, hasher: FileHasher) -> List[Stage]:
+    """Stages to run, in dependency order."""
+    by_name = {s.name: s for s in STAGES}
+    deps = dependencies(STAGES)
+
+    # Requested stages plus everything upstream and downstream of them
+    wanted = set(requested) if requested else {s.name for s in STAGES}
+    dependents = {s.name: [d.name for d in STAGES if s.name in deps[d.name]] for s in STAGES}
+    stack = list(wanted)
+    while stack:
+        for d in deps[stack.pop()]:
+            if d not in wanted:
+                wanted.add(d)
+                stack.append(d)
+    stack = list(requested)
+    while stack:
+        for d in dependents[stack.pop()]:
+            if d not in wanted:
+                wanted.add(d)
+                stack.append(d)
+
+    selected = set()
+    for s in STAGES:
+        if s.name not in wanted:
+            continue
+        if s.name in requested or not s.explicit or any(not os.path.exists(out) for out in s.outputs):
+            selected.add(s.name)
+
+    to_run = []
+    dirty = set()
+    for s in STAGES:
+        if s.name not in selected:
+            continue
+        forced = is_forced(s, requested, force)
+        # Upstream stages that re-run may produce identical outputs; re-check after they finish
+        if forced or any(d in dirty for d in deps[s.name]) or not is_current(s, state, hasher):
+            to_run.append(by_name[s.name])
+            dirty.add(s.name)
+    return to_run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh scraped data, index, evaluation and submission")
+    parser.add_argument("stages", nargs="*", help="Stages to consider (default: all except scrape)")
+    parser.add_argument("--force", action="store_true", help="Run the selected stages even if up to date")
+    parser.add_argument("--dry-run", action="store_true", help="Only print what would run")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    unknown = set(args.stages) - {s.name for s in STAGES}
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    started = time.perf_counter()
+    state = load_state()
+    hasher = FileHasher(state["files"])
+    to_run = plan(args.stages, args.force, state, hasher)
+    deps = dependencies(STAGES)
+
+    if not to_run:
+        save_state(state)
+        print(f"Everything is up to date ({time.perf_counter() - started:.2f}s)")
+        return
+    if args.dry_run:
+        print("Would run: " + ", ".join(s.name for s in to_run))
+        return
+
+    pending = {s.name: s for s in to_run}
+    forced = {s.name for s in to_run if is_forced(s, args.stages, args.force)}
+    done, failed = set(), set()
+    running = {}
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                in_flight = {s.name for s in running.values()}
+                waiting_on = [d for d in deps[name] if d in pending or d in in_flight]
+                if any(d in failed for d in deps[name]):
+                    print(f"[skip] {name}: dependency failed")
+                    failed.add(name)
+                    del pending[name]
+                elif not waiting_on:
+                    # A re-run upstream stage may have reproduced identical outputs
+                    if name not in forced and is_current(stage, state, hasher):
+                        print(f"[skip] {name}: inputs unchanged")
+                        del pending[name]
+                        continue
+                    print(f"[run]  {name}: {' '.join(stage.cmd)}")
+                    running[pool.submit(run_stage, stage)] = stage
+                    del pending[name]
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage = running.pop(future)
+                try:
+                    elapsed = future.result()
+                except subprocess.CalledProcessError:
+                    print(f"[fail] {stage.name}: see {LOG_DIR}/{stage.name}.log")
+                    failed.add(stage.name)
+                    continue
+                state["stages"][stage.name] = {
+                    "fingerprint": fingerprint(stage, hasher),
+                    "outputs": {path: hasher.hash(path) for path in stage.outputs},
+                    "finished_at": time.time(),
+                    "seconds": round(elapsed, 2),
+                }
+                save_state(state)
+                done.add(stage.name)
+                print(f"[done] {stage.name} in {elapsed:.1f}s")
+
+    save_state(state)
+    print(f"Pipeline finished in {time.perf_counter() - started:.1f}s")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Request timing and on-demand profiling.
+
+StageTimer collects per-stage durations for one request and renders them as a
+``Server-Timing`` header. When timing is disabled the shared NULL_TIMER is
+used instead, whose stages are a single reusable no-op context manager.
+
+SamplingProfiler is a statistical profiler: a background thread samples the
+stacks of all other threads at a fixed interval and aggregates them into the
+collapsed-stack format understood by flamegraph.pl and speedscope.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """Per-request stage durations."""
+
+    enabled = True
+
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, (time.perf_counter() - start) * 1000))
+
+    def add(self, name: str, duration_ms: float):
+        self.stages.append((name, duration_ms))
+
+    def header(self) -> str:
+        return ", ".join(f"{name};dur={ms:.2f}" for name, ms in self.stages)
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _NullTimer:
+    """Stand-in used when timing is off; costs one attribute lookup per stage."""
+
+    enabled = False
+    _stage = _NullStage()
+
+    def stage(self, name: str):
+        return self._stage
+
+    def add(self, name: str, duration_ms: float):
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    name = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return name.replace(";", ":")
+
+
+class SamplingProfiler:
+    """Samples all thread stacks every ``interval`` seconds into collapsed stacks."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.collapsed()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)).replace(";", ":"))
+                self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def collapsed(self) -> str:
+        """One ``frame;frame;frame count`` line per distinct stack."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
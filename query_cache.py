@@ -0,0 +1,157 @@
+"""
+Near-duplicate query cache.
+
+Recruiters paste the same job description with small edits (dates, location,
+salary), which an exact-match cache misses. Each query is reduced to a
+MinHash signature of its word shingles (digits folded to 0), and signatures
+are indexed with LSH banding. A query whose estimated Jaccard similarity to a
+cached one reaches the threshold reuses that entry's search results and
+embedding instead of calling the encoder.
+
+A small random sample of hits is also recomputed for real and compared with
+the cached entry (embedding cosine and result overlap), so the cost of the
+approximation can be monitored.
+"""
+
+import random
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+import numpy as np
+
+_WORD = re.compile(r"[a-z0-9]+")
+_DIGIT = re.compile(r"[0-9]")
+
+# Prime just above 2**32, so (a * x + b) fits in uint64 for 32-bit a and x
+_PRIME = np.uint64(4294967311)
+
+
+class CacheEntry:
+    __slots__ = ("key", "namespace", "signature", "ids", "embedding", "scores")
+
+    def __init__(self, key, namespace, signature, ids, embedding, scores=None):
+        self.key = key
+        self.namespace = namespace
+        self.signature = signature
+        self.ids = ids
+        self.embedding = embedding
+        self.scores = scores
+
+
+class NearDuplicateCache:
+    """MinHash/LSH cache of search results keyed by query similarity."""
+
+    def __init__(self, capacity: int = 2048, threshold: float = 0.9, num_perm: int = 64,
+                 bands: int = 16, shingle_size: int = 3, drift_sample_rate: float = 0.05, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.capacity = capacity
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.drift_sample_rate = drift_sample_rate
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self._random = random.Random(seed)
+
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        self._buckets = [dict() for _ in range(bands)]
+        self._next_key = 0
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.hits = 0
+        self.drift_checks = 0
+        self._cosines = []
+        self._overlaps = []
+
+    # ---------- signatures ----------
+
+    def shingles(self, text: str) -> np.ndarray:
+        words = _WORD.findall(_DIGIT.sub("0", text.lower()))
+        size = min(self.shingle_size, len(words)) or 1
+        grams = {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+        return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+    def signature(self, text: str) -> np.ndarray:
+        x = self.shingles(text)
+        return ((x[:, None] * self._a + self._b) % _PRIME).min(axis=0)
+
+    def _band_keys(self, namespace: Hashable, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, (namespace, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+
+    # ---------- lookup / insert ----------
+
+    def lookup(self, namespace: Hashable, signature: np.ndarray) -> Optional[CacheEntry]:
+        """Best cached entry at or above the similarity threshold, if any."""
+        with self._lock:
+            self.lookups += 1
+            candidates = set()
+            for band, key in self._band_keys(namespace, signature):
+                candidates.update(self._buckets[band].get(key, ()))
+
+            best, best_sim = None, self.threshold
+            for key in candidates:
+                entry = self._entries[key]
+                sim = float(np.mean(entry.signature == signature))
+                if sim >= best_sim:
+                    best, best_sim = entry, sim
+
+            if best is not None:
+                self.hits += 1
+                self._entries.move_to_end(best.key)
+            return best
+
+    def add(self, namespace: Hashable, signature: np.ndarray, ids, embedding=None, scores=None):
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+            self._entries[key] = CacheEntry(key, namespace, signature, ids, embedding, scores)
+            for band, bucket_key in self._band_keys(namespace, signature):
+                self._buckets[band].setdefault(bucket_key, set()).add(key)
+
+            while len(self._entries) > self.capacity:
+                _, old = self._entries.popitem(last=False)
+                for band, bucket_key in self._band_keys(old.namespace, old.signature):
+                    bucket = self._buckets[band][bucket_key]
+                    bucket.discard(old.key)
+                    if not bucket:
+                        del self._buckets[band][bucket_key]
+
+    # ---------- drift monitoring ----------
+
+    def should_check_drift(self) -> bool:
+        return self._random.random() < self.drift_sample_rate
+
+    def record_drift(self, entry: CacheEntry, ids, embedding=None):
+        """Compare a hit's cached entry with the freshly computed results."""
+        overlap = len(set(entry.ids) & set(ids)) / max(1, len(ids))
+        with self._lock:
+            self.drift_checks += 1
+            self._overlaps.append(overlap)
+            if embedding is not None and entry.embedding is not None:
+                a, b = entry.embedding.ravel(), embedding.ravel()
+                self._cosines.append(float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b))))
+            # Keep a bounded window of recent checks
+            del self._overlaps[:-1000], self._cosines[:-1000]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                "drift_checks": self.drift_checks,
+                "drift_mean_overlap": round(float(np.mean(self._overlaps)), 4) if self._overlaps else None,
+                "drift_mean_cosine": round(float(np.mean(self._cosines)), 4) if self._cosines else None,
+                "drift_min_cosine": round(float(np.min(self._cosines)), 4) if self._cosines else None,
+            }
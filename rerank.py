@@ -1,7 +1,57 @@
-def infer_intent(query: str):
+import json
+import os
+
+import numpy as np
+
+TYPE_K, TYPE_P, TYPE_OTHER = 0, 1, 2
+TYPE_CODES = {"K": TYPE_K, "P": TYPE_P}
+
+# intent -> ordered (test_type, count) quotas
+QUOTAS = {
+    "balanced": [("K", 4), ("P", 2)],
+    "technical": [("K", 5), ("P", 1)],
+    "behavioral": [("P", 5), ("K", 1)],
+}
+
+INTENTS = ("balanced", "technical", "behavioral")
+INTENT_CODES = {intent: code for code, intent in enumerate(INTENTS)}
+
+TECH_KEYWORDS = ["java", "developer", "coding", "software"]
+SOFT_KEYWORDS = ["communication", "leadership", "behavior"]
+
+# Number of FAISS candidates reranked per query
+CANDIDATE_DEPTH = 10
+
+
+def load_config(path="rerank_config.json"):
+    """Apply a config written by tune_rerank.py, if the file exists.
+
+    Returns the loaded config (empty if there is none).
+    """
+    global CANDIDATE_DEPTH
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    if "quotas" in config:
+        QUOTAS.update({
+            intent: [(test_type, int(count)) for test_type, count in quotas]
+            for intent, quotas in config["quotas"].items()
+        })
+    if "tech_keywords" in config:
+        TECH_KEYWORDS[:] = config["tech_keywords"]
+    if "soft_keywords" in config:
+        SOFT_KEYWORDS[:] = config["soft_keywords"]
+    CANDIDATE_DEPTH = int(config.get("candidate_depth", CANDIDATE_DEPTH))
+    return config
+
+
+def infer_intent(query: str, tech_keywords=None, soft_keywords=None):
     q = query.lower()
-    tech = any(k in q for k in ["java", "developer", "coding", "software"])
-    soft = any(k in q for k in ["communication", "leadership", "behavior"])
+    tech = any(k in q for k in (tech_keywords or TECH_KEYWORDS))
+    soft = any(k in q for k in (soft_keywords or SOFT_KEYWORDS))
 
     if tech and soft:
         return "balanced"
@@ -12,27 +62,104 @@ def infer_intent(query: str):
     return "balanced"
 
 
+# Filter obvious non-assessments
+def is_valid_name(name: str):
+    return "report" not in name.lower()
+
+
 def rerank_results(results, intent, top_n=6):
     final = []
 
-    k_tests = [r for r in results if r["test_type"] == "K"]
-    p_tests = [r for r in results if r["test_type"] == "P"]
+    for test_type, count in QUOTAS.get(intent, QUOTAS["behavioral"]):
+        matching = [r for r in results if r["test_type"] == test_type]
+        final.extend([r for r in matching if is_valid_name(r["assessment_name"])][:count])
 
-    # Filter obvious non-assessments
-    def is_valid(r):
-        return "report" not in r["assessment_name"].lower()
+    return final[:top_n]
 
-    k_tests = list(filter(is_valid, k_tests))
-    p_tests = list(filter(is_valid, p_tests))
 
-    if intent == "balanced":
-        final.extend(k_tests[:4])
-        final.extend(p_tests[:2])
-    elif intent == "technical":
-        final.extend(k_tests[:5])
-        final.extend(p_tests[:1])
-    else:
-        final.extend(p_tests[:5])
-        final.extend(k_tests[:1])
+def rerank_ids(ids, type_codes, valid, intent, top_n=6, quotas=None):
+    """Same selection as rerank_results, over catalog ids.
+
+    ``type_codes`` and ``valid`` are per-item arrays (see CatalogStore).
+    """
+    quotas = quotas or QUOTAS
+    final = []
+    for test_type, count in quotas.get(intent, quotas["behavioral"]):
+        code = TYPE_CODES[test_type]
+        final.extend([i for i in ids if type_codes[i] == code and valid[i]][:count])
 
     return final[:top_n]
+
+
+def rerank_batch(I, type_codes, valid, intent_codes, top_n=6, quotas=None):
+    """rerank_ids for a whole (n_queries, k) candidate matrix at once.
+
+    ``intent_codes`` holds one INTENT_CODES value per query. Returns an
+    (n_queries, top_n) id matrix, padded with -1 where a query has fewer
+    results; row by row it matches rerank_ids. Candidate ids of -1 (missing
+    FAISS results) are ignored.
+    """
+    quotas = quotas or QUOTAS
+    I = np.asarray(I)
+    intent_codes = np.asarray(intent_codes)
+    out = np.full((len(I), top_n), -1, dtype=np.int64)
+
+    present = I >= 0
+    safe = np.where(present, I, 0)
+    codes = np.where(present, type_codes[safe], -1)
+    ok = present & valid[safe]
+
+    for code, intent in enumerate(INTENTS):
+        rows = np.flatnonzero(intent_codes == code)
+        if not rows.size:
+            continue
+
+        # Next free output slot per row; quota segments are laid out in order
+        offset = np.zeros(len(rows), dtype=np.int64)
+        for test_type, count in quotas.get(intent, quotas["behavioral"]):
+            mask = ok[rows] & (codes[rows] == TYPE_CODES[test_type])
+            rank = np.cumsum(mask, axis=1) - 1
+            pos = offset[:, None] + rank
+            r, c = np.nonzero(mask & (rank < count) & (pos < top_n))
+            out[rows[r], pos[r, c]] = I[rows[r], c]
+            offset += np.minimum(mask.sum(axis=1), count)
+
+    return out
+
+
+def distances_to_similarity(D):
+    """Cosine similarity from FAISS squared L2 distances of unit-norm embeddings."""
+    return 1.0 - np.asarray(D, dtype=np.float32) / 2.0
+
+
+def mmr_order(ids, sim, lam=0.7, relevance=None):
+    """Reorder candidates by maximal marginal relevance.
+
+    Relevance is the query-candidate similarity in ``relevance`` (aligned with
+    ``ids``, e.g. from distances_to_similarity), so real score gaps count;
+    without it the incoming rank order is used. Redundancy comes from the
+    precomputed item-item similarity matrix ``sim``, so this only does array
+    lookups. ``lam`` = 1 keeps the original order.
+    """
+    ids = [int(i) for i in ids]
+    n = len(ids)
+    if n < 2:
+        return ids
+
+    if relevance is None:
+        relevance = 1.0 - np.arange(n) / n
+    else:
+        relevance = np.asarray(relevance, dtype=np.float32)
+    pair_sim = np.asarray(sim[np.ix_(ids, ids)], dtype=np.float32)
+
+    selected = [0]
+    remaining = list(range(1, n))
+    max_sim = pair_sim[0].copy()
+    while remaining:
+        scores = lam * relevance[remaining] - (1 - lam) * max_sim[remaining]
+        best = remaining[int(np.argmax(scores))]
+        selected.append(best)
+        remaining.remove(best)
+        np.maximum(max_sim, pair_sim[best], out=max_sim)
+
+    return [ids[i] for i in selected]
@@ -7,7 +7,7 @@ import csv
 import json
 import time
 import re
-from typing import List, Dict, Optional, Set
+from typing import Iterator, List, Dict, Optional, Set
 from urllib.parse import urljoin, urlparse
 import logging
 
@@ -16,9 +16,15 @@ try:
     PLAYWRIGHT_AVAILABLE = True
 except ImportError:
     PLAYWRIGHT_AVAILABLE = False
+    Page = Browser = None
 
 from bs4 import BeautifulSoup
 
+import catalog_artifact
+from crawl_metrics import CrawlMetrics
+from crawl_store import CrawlStore
+from fetch_scheduler import FetchScheduler
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -30,10 +36,72 @@ class SHLScraper:
     BASE_URL = "https://www.shl.com"
     CATALOG_URL = "https://www.shl.com/solutions/products/product-catalog/"
     
-    def __init__(self):
+    def __init__(self, scheduler: Optional[FetchScheduler] = None, store: Optional[CrawlStore] = None,
+                 metrics: Optional[CrawlMetrics] = None):
         self.assessments = []
         self.seen_urls: Set[str] = set()
         self.category_stats = {}
+        self.failed_urls: Dict[str, str] = {}
+        # Per-host rate limiting, retries and circuit breaking for every navigation
+        self.scheduler = scheduler or FetchScheduler()
+        # Optional persistent frontier/result store; when set, nothing is kept in memory
+        self.store = store
+        # Per-page/per-stage timings and bytes (optionally traced to JSONL)
+        self.metrics = metrics or CrawlMetrics()
+    
+    def is_seen(self, url: str) -> bool:
+        """Whether an assessment URL has already been collected."""
+        if self.store is not None:
+            return self.store.has_assessment(url)
+        return url in self.seen_urls
+    
+    def add_assessments(self, assessments: List[Dict]) -> int:
+        """Add assessments not seen before. Returns how many were new."""
+        if self.store is not None:
+            return self.store.add_assessments(assessments)
+        
+        new_count = 0
+        for assessment in assessments:
+            if assessment['url'] not in self.seen_urls:
+                self.seen_urls.add(assessment['url'])
+                self.assessments.append(assessment)
+                new_count += 1
+        return new_count
+    
+    def assessment_count(self) -> int:
+        if self.store is not None:
+            return self.store.count_assessments()
+        return len(self.assessments)
+    
+    def iter_assessments(self) -> Iterator[Dict]:
+        if self.store is not None:
+            return self.store.iter_assessments()
+        return iter(self.assessments)
+    
+    def goto(self, page: Page, url: str, timeout: int):
+        """Navigate to a URL through the fetch scheduler."""
+        def navigate(target):
+            response = page.goto(target, wait_until='domcontentloaded', timeout=timeout)
+            if response is not None:
+                # Size of the document as served; the DOM is not re-encoded to count it
+                self.metrics.add_bytes(len(response.body()))
+            return (response.status if response else 200), response
+        with self.metrics.stage("navigate"):
+            return self.scheduler.fetch(url, navigate)
+    
+    def wait(self, seconds: float):
+        """Fixed wait for JavaScript and lazy loading."""
+        with self.metrics.stage("sleep"):
+            time.sleep(seconds)
+    
+    def scroll(self, page: Page, script: str):
+        with self.metrics.stage("scroll"):
+            page.evaluate(script)
+    
+    def page_html(self, page: Page) -> str:
+        """Serialized DOM of the current page."""
+        with self.metrics.stage("content"):
+            return page.content()
     
     def extract_test_type(self, text: str) -> Optional[str]:
         """Extract test type (K or P) from text."""
@@ -97,10 +165,14 @@ class SHLScraper:
     def extract_categories(self, page: Page) -> List[Dict]:
         """Extract category and subcategory links from the main catalog page."""
         logger.info("Extracting categories from catalog page...")
+        html = self.page_html(page)
+        with self.metrics.stage("parse"):
+            return self.parse_categories(html)
+    
+    def parse_categories(self, html: str) -> List[Dict]:
+        """Category and subcategory links in catalog page HTML."""
         categories = []
         seen_urls = set()
-        
-        html = page.content()
         soup = BeautifulSoup(html, 'html.parser')
         
         # Focus on product/assessment category pages
@@ -161,8 +233,15 @@ class SHLScraper:
     
     def extract_assessments_from_page(self, page: Page, category_name: str = "") -> List[Dict]:
         """Extract all assessment cards/links from the current page."""
+        html = self.page_html(page)
+        with self.metrics.stage("parse"):
+            assessments = self.parse_assessments(html, category_name)
+        self.metrics.add_items(len(assessments))
+        return assessments
+    
+    def parse_assessments(self, html: str, category_name: str = "") -> List[Dict]:
+        """Assessment cards/links in page HTML."""
         assessments = []
-        html = page.content()
         soup = BeautifulSoup(html, 'html.parser')
         
         # Strategy 1: Find all links to product-catalog/view (most reliable)
@@ -182,6 +261,7 @@ class SHLScraper:
         
         logger.info(f"Found {len(all_links)} assessment links on page")
         
+        page_seen = set()
         for link in all_links:
             href = link.get('href', '')
             if not href or '/products/product-catalog/view/' not in href:
@@ -195,10 +275,12 @@ class SHLScraper:
             full_url = urljoin(self.BASE_URL, href)
             
             # Deduplicate by URL
-            if full_url in self.seen_urls:
+            if full_url in page_seen or self.is_seen(full_url):
                 continue
             
-            self.seen_urls.add(full_url)
+            page_seen.add(full_url)
+            if self.store is None:
+                self.seen_urls.add(full_url)
             
             # Extract assessment name
             name = link.get_text(strip=True)
@@ -261,22 +343,28 @@ class SHLScraper:
         """Scrape a category page for assessments."""
         try:
             logger.info(f"Scraping category: {category_name} ({category_url})")
-            page.goto(category_url, wait_until='domcontentloaded', timeout=60000)
-            time.sleep(8)  # Wait for JavaScript to load content
-            
-            # Scroll multiple times to trigger lazy loading
-            for i in range(5):
-                page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                time.sleep(2)
-                page.evaluate("window.scrollBy(0, -300)")
-                time.sleep(1)
-            
-            # Final scroll to bottom
-            page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            time.sleep(3)
-            
-            # Extract assessments
-            assessments = self.extract_assessments_from_page(page, category_name)
+            with self.metrics.page(category_url, "category"):
+                started = time.perf_counter()
+                self.goto(page, category_url, timeout=60000)
+                self.wait(8)  # Wait for JavaScript to load content
+                
+                # Scroll multiple times to trigger lazy loading
+                for i in range(5):
+                    self.scroll(page, "window.scrollTo(0, document.body.scrollHeight)")
+                    self.wait(2)
+                    self.scroll(page, "window.scrollBy(0, -300)")
+                    self.wait(1)
+                
+                # Final scroll to bottom
+                self.scroll(page, "window.scrollTo(0, document.body.scrollHeight)")
+                self.wait(3)
+                
+                if self.store is not None:
+                    self.store.mark_fetched(category_url, (time.perf_counter() - started) * 1000)
+                
+                # Extract assessments
+                parse_started = time.perf_counter()
+                assessments = self.extract_assessments_from_page(page, category_name)
             logger.info(f"Found {len(assessments)} assessments in category '{category_name}'")
             
             # Update category stats
@@ -284,40 +372,66 @@ class SHLScraper:
                 self.category_stats[category_name] = 0
             self.category_stats[category_name] += len(assessments)
             
+            if self.store is not None:
+                # Store results before marking the page parsed so a resumed crawl never loses them
+                self.add_assessments(assessments)
+                self.store.mark_parsed(category_url, (time.perf_counter() - parse_started) * 1000)
+            
             return assessments
         except Exception as e:
-            logger.warning(f"Error scraping category page {category_url}: {e}")
+            logger.error(f"Error scraping category page {category_url}: {e}")
+            self.failed_urls[category_url] = str(e)
+            if self.store is not None:
+                self.store.mark_failed(category_url, str(e))
             return []
     
     def scrape_individual_page(self, page: Page, url: str) -> Optional[Dict]:
         """Scrape an individual assessment page for detailed information."""
         try:
-            page.goto(url, wait_until='domcontentloaded', timeout=30000)
-            time.sleep(2)
-            
-            html = page.content()
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Extract description from meta tag
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            description = meta_desc.get('content', '') if meta_desc else ""
+            with self.metrics.page(url, "detail"):
+                started = time.perf_counter()
+                self.goto(page, url, timeout=30000)
+                self.wait(2)
+                
+                html = self.page_html(page)
+                if self.store is not None:
+                    self.store.mark_fetched(url, (time.perf_counter() - started) * 1000, len(html))
+                parse_started = time.perf_counter()
+                with self.metrics.stage("parse"):
+                    description = self.parse_description(html)
             
-            # Try to get description from main content
-            if not description or len(description) < 20:
-                main_content = soup.find('main') or soup.find('article') or \
-                              soup.find('div', class_=re.compile(r'content|description|intro', re.I))
-                if main_content:
-                    paragraphs = main_content.find_all('p')
-                    if paragraphs:
-                        description = ' '.join([p.get_text(strip=True) for p in paragraphs[:3]])
+            if self.store is not None:
+                self.store.mark_parsed(url, (time.perf_counter() - parse_started) * 1000)
             
             return {
                 'description': description.strip() if description else None
             }
         except Exception as e:
-            logger.debug(f"Error scraping individual page {url}: {e}")
+            logger.warning(f"Error scraping individual page {url}: {e}")
+            self.failed_urls[url] = str(e)
+            if self.store is not None:
+                self.store.mark_failed(url, str(e))
             return None
     
+    @staticmethod
+    def parse_description(html: str) -> str:
+        """Description of an individual assessment page."""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Extract description from meta tag
+        meta_desc = soup.find('meta', attrs={'name': 'description'})
+        description = meta_desc.get('content', '') if meta_desc else ""
+        
+        # Try to get description from main content
+        if not description or len(description) < 20:
+            main_content = soup.find('main') or soup.find('article') or \
+                          soup.find('div', class_=re.compile(r'content|description|intro', re.I))
+            if main_content:
+                paragraphs = main_content.find_all('p')
+                if paragraphs:
+                    description = ' '.join([p.get_text(strip=True) for p in paragraphs[:3]])
+        return description
+    
     def scrape(self, min_assessments: int = 377) -> List[Dict]:
         """Main scraping method using category-driven aggregation."""
         if not PLAYWRIGHT_AVAILABLE:
@@ -338,25 +452,35 @@ class SHLScraper:
             try:
                 # Step 1: Load main catalog page and extract categories
                 logger.info("Loading main catalog page...")
-                page.goto(self.CATALOG_URL, wait_until='domcontentloaded', timeout=90000)
-                time.sleep(8)
-                
-                # Also extract assessments from main page
-                main_assessments = self.extract_assessments_from_page(page, "Main Catalog")
-                self.assessments.extend(main_assessments)
+                with self.metrics.page(self.CATALOG_URL, "catalog"):
+                    self.goto(page, self.CATALOG_URL, timeout=90000)
+                    self.wait(8)
+                    
+                    # Also extract assessments from main page
+                    main_assessments = self.extract_assessments_from_page(page, "Main Catalog")
+                    
+                    # Extract category links
+                    categories = self.extract_categories(page)
+                if self.store is not None:
+                    self.store.add_assessments(main_assessments)
+                else:
+                    self.assessments.extend(main_assessments)
                 logger.info(f"Found {len(main_assessments)} assessments on main catalog page")
-                
-                # Extract category links
-                categories = self.extract_categories(page)
                 logger.info(f"Found {len(categories)} category links to explore")
+                if self.store is not None:
+                    self.store.enqueue([c['url'] for c in categories], 'category')
                 
                 # Step 2: Visit each category page and extract assessments
                 for i, category in enumerate(categories, 1):
-                    if len(self.assessments) >= min_assessments:
+                    if self.assessment_count() >= min_assessments:
                         logger.info(f"Reached target of {min_assessments} assessments, stopping category scraping")
                         break
                     
+                    if self.store is not None and self.store.is_parsed(category['url']):
+                        continue
+                    
                     logger.info(f"Processing category {i}/{len(categories)}: {category['name']}")
+                    count_before = self.assessment_count()
                     category_assessments = self.scrape_category_page(
                         page, 
                         category['url'], 
@@ -364,73 +488,76 @@ class SHLScraper:
                     )
                     
                     # Deduplicate and add (strict deduplication by URL)
-                    new_count = 0
-                    for assessment in category_assessments:
-                        if assessment['url'] not in self.seen_urls:
-                            self.seen_urls.add(assessment['url'])
-                            self.assessments.append(assessment)
-                            new_count += 1
+                    self.add_assessments(category_assessments)
+                    new_count = self.assessment_count() - count_before
                     
                     if new_count > 0:
-                        logger.info(f"Added {new_count} new assessments (total: {len(self.assessments)})")
-                    
-                    time.sleep(1)  # Rate limiting
+                        logger.info(f"Added {new_count} new assessments (total: {self.assessment_count()})")
                 
                 # Step 3: If we still don't have enough, discover more categories from visited pages
-                if len(self.assessments) < min_assessments:
-                    logger.info(f"Found {len(self.assessments)} assessments, discovering more category pages...")
+                if self.assessment_count() < min_assessments:
+                    logger.info(f"Found {self.assessment_count()} assessments, discovering more category pages...")
                     discovered_categories = []
                     
                     # Re-visit main catalog page to find more category links we might have missed
                     try:
-                        page.goto(self.CATALOG_URL, wait_until='domcontentloaded', timeout=60000)
-                        time.sleep(5)
-                        html = page.content()
-                        soup = BeautifulSoup(html, 'html.parser')
-                        
-                        # Look for all links to assessment/product pages (broader search)
-                        all_category_links = soup.find_all('a', href=re.compile(r'/products/assessments/'))
-                        for link in all_category_links:
-                            href = link.get('href', '')
-                            if '/view/' not in href:
-                                full_url = urljoin(self.BASE_URL, href)
-                                if full_url not in [c['url'] for c in categories + discovered_categories]:
-                                    discovered_categories.append({
-                                        'name': link.get_text(strip=True) or 'Discovered Category',
-                                        'url': full_url,
-                                        'type': 'discovered'
-                                    })
+                        with self.metrics.page(self.CATALOG_URL, "discovery"):
+                            self.goto(page, self.CATALOG_URL, timeout=60000)
+                            self.wait(5)
+                            html = self.page_html(page)
+                            with self.metrics.stage("parse"):
+                                soup = BeautifulSoup(html, 'html.parser')
+                                
+                                # Look for all links to assessment/product pages (broader search)
+                                all_category_links = soup.find_all('a', href=re.compile(r'/products/assessments/'))
+                                for link in all_category_links:
+                                    href = link.get('href', '')
+                                    if '/view/' not in href:
+                                        full_url = urljoin(self.BASE_URL, href)
+                                        if full_url not in [c['url'] for c in categories + discovered_categories]:
+                                            discovered_categories.append({
+                                                'name': link.get_text(strip=True) or 'Discovered Category',
+                                                'url': full_url,
+                                                'type': 'discovered'
+                                            })
                     except Exception as e:
                         logger.warning(f"Error discovering additional categories: {e}")
                     
                     # Process discovered categories
+                    if self.store is not None:
+                        self.store.enqueue([c['url'] for c in discovered_categories], 'category')
                     for category in discovered_categories:
-                        if len(self.assessments) >= min_assessments:
+                        if self.assessment_count() >= min_assessments:
                             break
                         
+                        if self.store is not None and self.store.is_parsed(category['url']):
+                            continue
+                        
+                        count_before = self.assessment_count()
                         category_assessments = self.scrape_category_page(
                             page, 
                             category['url'], 
                             category['name']
                         )
                         
-                        new_count = 0
-                        for assessment in category_assessments:
-                            if assessment['url'] not in self.seen_urls:
-                                self.seen_urls.add(assessment['url'])
-                                self.assessments.append(assessment)
-                                new_count += 1
+                        self.add_assessments(category_assessments)
+                        new_count = self.assessment_count() - count_before
                         
                         if new_count > 0:
-                            logger.info(f"Added {new_count} new assessments from discovered category (total: {len(self.assessments)})")
-                        
-                        time.sleep(1)
+                            logger.info(f"Added {new_count} new assessments from discovered category (total: {self.assessment_count()})")
                 
                 # Step 4: Optionally enrich descriptions by visiting individual pages
                 # Limit to avoid too many requests
-                if self.assessments:
+                if self.assessment_count():
                     logger.info("Enriching assessments with detailed descriptions...")
-                    for i, assessment in enumerate(self.assessments[:100]):
+                    if self.store is not None:
+                        to_enrich = list(self.store.iter_assessments(limit=100))
+                        self.store.enqueue([a['url'] for a in to_enrich], 'detail')
+                    else:
+                        to_enrich = self.assessments[:100]
+                    for i, assessment in enumerate(to_enrich):
+                        if self.store is not None and self.store.is_parsed(assessment['url']):
+                            continue
                         if assessment['description'] == "No description available":
                             page_data = self.scrape_individual_page(page, assessment['url'])
                             if page_data and page_data.get('description'):
@@ -444,31 +571,63 @@ class SHLScraper:
                                 )
                                 if inferred != "Unknown":
                                     assessment['test_type'] = inferred
+                            
+                            if self.store is not None:
+                                self.store.update_assessment(
+                                    assessment['url'],
+                                    description=assessment['description'],
+                                    test_type=assessment['test_type']
+                                )
                         
                         if (i + 1) % 20 == 0:
-                            logger.info(f"Enriched {i + 1}/{min(len(self.assessments), 100)} assessments")
-                        
-                        time.sleep(1)  # Rate limiting
+                            logger.info(f"Enriched {i + 1}/{len(to_enrich)} assessments")
                 
             finally:
                 browser.close()
         
-        logger.info(f"Total assessments scraped: {len(self.assessments)}")
+        if self.store is not None:
+            self.store.flush()
+            logger.info(f"Crawl frontier: {self.store.state_counts()}")
+        logger.info(f"Total assessments scraped: {self.assessment_count()}")
+        if self.failed_urls:
+            logger.error(f"{len(self.failed_urls)} pages failed after retries: {sorted(self.failed_urls)}")
+        logger.info(f"Fetch scheduler: {self.scheduler.summary()}")
+        logger.info(self.metrics.format_summary())
         return self.assessments
     
+    @staticmethod
+    def is_exportable(a: Dict) -> bool:
+        """Filter out Pre-packaged Job Solutions."""
+        return ('pre-packaged' not in (a.get('assessment_name') or '').lower() and
+                'pre-packaged' not in (a.get('category') or '').lower() and
+                'job solution' not in (a.get('assessment_name') or '').lower())
+    
+    def save_to_parquet(self, filename: str = catalog_artifact.CATALOG_PATH) -> int:
+        """Stream exportable assessments into the columnar catalog artifact."""
+        if not self.assessment_count():
+            logger.warning("No assessments to save")
+            return 0
+        
+        with catalog_artifact.CatalogWriter(filename) as writer:
+            for a in self.iter_assessments():
+                if self.is_exportable(a):
+                    writer.write(a)
+        
+        logger.info(f"Saved {writer.count} assessments to {filename}")
+        return writer.count
+    
     def save_to_csv(self, filename: str = "shl_assessments.csv"):
         """Save scraped assessments to CSV."""
-        if not self.assessments:
+        if not self.assessment_count():
             logger.warning("No assessments to save")
             return
         
-        # Filter out Pre-packaged Job Solutions
-        filtered = [
-            a for a in self.assessments 
-            if 'pre-packaged' not in a.get('assessment_name', '').lower() and
-               'pre-packaged' not in a.get('category', '').lower() and
-               'job solution' not in a.get('assessment_name', '').lower()
-        ]
+        if self.store is not None:
+            count = self.store.export_csv(filename, keep=self.is_exportable)
+            logger.info(f"Saved {count} assessments to {filename}")
+            return
+        
+        filtered = [a for a in self.assessments if self.is_exportable(a)]
         
         with open(filename, 'w', newline='', encoding='utf-8') as f:
             fieldnames = ['assessment_name', 'description', 'test_type', 'category', 'url']
@@ -480,17 +639,16 @@ class SHLScraper:
     
     def save_to_json(self, filename: str = "shl_assessments.json"):
         """Save scraped assessments to JSON."""
-        if not self.assessments:
+        if not self.assessment_count():
             logger.warning("No assessments to save")
             return
         
-        # Filter out Pre-packaged Job Solutions
-        filtered = [
-            a for a in self.assessments 
-            if 'pre-packaged' not in a.get('assessment_name', '').lower() and
-               'pre-packaged' not in a.get('category', '').lower() and
-               'job solution' not in a.get('assessment_name', '').lower()
-        ]
+        if self.store is not None:
+            count = self.store.export_json(filename, keep=self.is_exportable)
+            logger.info(f"Saved {count} assessments to {filename}")
+            return
+        
+        filtered = [a for a in self.assessments if self.is_exportable(a)]
         
         with open(filename, 'w', encoding='utf-8') as f:
             json.dump(filtered, f, indent=2, ensure_ascii=False)
@@ -500,47 +658,57 @@ class SHLScraper:
 
 def main():
     """Main function to run the scraper."""
-    scraper = SHLScraper()
+    import argparse
+    parser = argparse.ArgumentParser(description="Scrape the SHL product catalog")
+    parser.add_argument("--db", help="SQLite crawl database; enables streaming output and resume")
+    parser.add_argument("--trace", help="Write per-page stage timings to this JSONL file")
+    args = parser.parse_args()
+    
+    store = CrawlStore(args.db) if args.db else None
+    scraper = SHLScraper(store=store, metrics=CrawlMetrics(args.trace))
     
     try:
-        assessments = scraper.scrape(min_assessments=377)
-        
-        # Filter for Individual Test Solutions
-        individual_solutions = [
-            a for a in assessments 
-            if '/products/product-catalog/view/' in a.get('url', '') and
-               'pre-packaged' not in a.get('assessment_name', '').lower() and
-               'job solution' not in a.get('assessment_name', '').lower()
-        ]
+        scraper.scrape(min_assessments=377)
         
-        if individual_solutions:
-            scraper.save_to_csv()
-            scraper.save_to_json()
+        # Count Individual Test Solutions in one streaming pass
+        individual_count = 0
+        prepackaged_count = 0
+        test_types = {}
+        for a in scraper.iter_assessments():
+            if '/products/product-catalog/view/' not in a.get('url', ''):
+                continue
+            if not scraper.is_exportable(a):
+                prepackaged_count += 1
+                continue
+            individual_count += 1
+            test_type = a.get('test_type', 'Unknown')
+            test_types[test_type] = test_types.get(test_type, 0) + 1
+        
+        if individual_count:
+            # The Parquet artifact is the source of truth; CSV/JSON are derived from it
+            scraper.save_to_parquet()
+            catalog_artifact.export_csv()
+            catalog_artifact.export_json()
             
             # Print validation summary
             print(f"\n{'='*80}")
             print("SCRAPER VALIDATION SUMMARY")
             print(f"{'='*80}")
-            print(f"Total Individual Test Solutions: {len(individual_solutions)}")
+            print(f"Total Individual Test Solutions: {individual_count}")
             print(f"Target: >= 377")
-            print(f"Status: {'[OK]' if len(individual_solutions) >= 377 else '[INCOMPLETE]'}")
+            print(f"Status: {'[OK]' if individual_count >= 377 else '[INCOMPLETE]'}")
             
             print(f"\nCategory-wise counts:")
             for category, count in sorted(scraper.category_stats.items(), key=lambda x: x[1], reverse=True):
                 print(f"  - {category}: {count}")
             
             print(f"\nTest Type Distribution:")
-            test_types = {}
-            for a in individual_solutions:
-                test_type = a.get('test_type', 'Unknown')
-                test_types[test_type] = test_types.get(test_type, 0) + 1
-            
             for k, v in sorted(test_types.items()):
                 print(f"  - {k}: {v}")
             
             # Check for Pre-packaged solutions
-            prepackaged = [a for a in individual_solutions if 'pre-packaged' in a.get('assessment_name', '').lower()]
-            print(f"\nPre-packaged Job Solutions found: {len(prepackaged)} (should be 0)")
+            print(f"\nPre-packaged Job Solutions excluded: {prepackaged_count}")
+            print(f"Pages failed after retries: {len(scraper.failed_urls)}")
             
             print(f"\n{'='*80}")
         else:
@@ -549,6 +717,10 @@ def main():
     except Exception as e:
         logger.error(f"Scraper failed: {e}", exc_info=True)
         print(f"\n[ERROR] Error: {e}")
+    finally:
+        scraper.metrics.close()
+        if store is not None:
+            store.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,148 @@
+"""
+Shadow traffic for a candidate index or encoder.
+
+A sample of live /recommend queries is copied onto a bounded queue after the
+primary response has been computed (callers check ``sample()`` first, so
+unsampled requests pay nothing). A background worker replays them against the
+candidate and records, per request:
+
+  - latency of the primary and the candidate (and their difference)
+  - top-k overlap of the two result lists
+  - Spearman rank correlation over the union of the two lists
+
+Results are compared by URL, so the candidate may be built from a different
+catalog snapshot. The worker backs off while interactive requests are in
+flight, and a full queue drops the sample instead of blocking, so shadowing
+never adds latency to the primary path.
+"""
+
+import queue
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+def overlap(primary: Sequence[str], candidate: Sequence[str]) -> float:
+    if not primary:
+        return 1.0 if not candidate else 0.0
+    return len(set(primary) & set(candidate)) / len(primary)
+
+
+def rank_correlation(primary: Sequence[str], candidate: Sequence[str]) -> float:
+    """Spearman correlation of ranks; items missing from a list rank just below it."""
+    union = list(dict.fromkeys(list(primary) + list(candidate)))
+    if len(union) < 2:
+        return 1.0
+    pos_a = {u: i for i, u in enumerate(primary)}
+    pos_b = {u: i for i, u in enumerate(candidate)}
+    a = np.array([pos_a.get(u, len(primary)) for u in union], dtype=np.float64)
+    b = np.array([pos_b.get(u, len(candidate)) for u in union], dtype=np.float64)
+    if a.std() == 0 or b.std() == 0:
+        return 1.0 if np.array_equal(a, b) else 0.0
+    return float(np.corrcoef(a, b)[0, 1])
+
+
+class ShadowRunner:
+    """Samples primary requests onto a queue and replays them against a candidate."""
+
+    def __init__(self, score: Callable[[str, int], List[str]], sample_rate: float = 0.1,
+                 queue_size: int = 64, window: int = 1000,
+                 is_busy: Callable[[], bool] = lambda: False, poll_interval: float = 0.01):
+        self.score = score
+        self.sample_rate = sample_rate
+        self.is_busy = is_busy
+        self.poll_interval = poll_interval
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._records = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self._thread: Optional[threading.Thread] = None
+
+        self.offered = 0
+        self.sampled = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="shadow", daemon=True)
+            self._thread.start()
+
+    def sample(self) -> bool:
+        """Whether to shadow the current request; decide before building its offer."""
+        self.offered += 1
+        return self._random.random() < self.sample_rate
+
+    def offer(self, query: str, top_k: int, primary: List[str], primary_ms: float) -> bool:
+        """Queue a sampled primary request for shadowing. Never blocks."""
+        try:
+            self._queue.put_nowait((query, top_k, primary, primary_ms))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.sampled += 1
+        return True
+
+    def _run(self):
+        while True:
+            query, top_k, primary, primary_ms = self._queue.get()
+            while self.is_busy():
+                time.sleep(self.poll_interval)
+            started = time.perf_counter()
+            try:
+                candidate = self.score(query, top_k)
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                continue
+            shadow_ms = (time.perf_counter() - started) * 1000
+            record = {
+                "primary_ms": primary_ms,
+                "shadow_ms": shadow_ms,
+                "overlap": overlap(primary, candidate),
+                "rank_corr": rank_correlation(primary, candidate),
+                "identical": list(primary) == list(candidate),
+            }
+            with self._lock:
+                self._records.append(record)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            records = list(self._records)
+            errors = self.errors
+
+        report = {
+            "sample_rate": self.sample_rate,
+            "offered": self.offered,
+            "sampled": self.sampled,
+            "dropped": self.dropped,
+            "errors": errors,
+            "queued": self._queue.qsize(),
+            "compared": len(records),
+        }
+        if not records:
+            return report
+
+        def stats(values):
+            values = np.asarray(values)
+            return {
+                "mean": round(float(values.mean()), 3),
+                "p50": round(float(np.percentile(values, 50)), 3),
+                "p95": round(float(np.percentile(values, 95)), 3),
+            }
+
+        primary = [r["primary_ms"] for r in records]
+        shadow = [r["shadow_ms"] for r in records]
+        report.update({
+            "primary_ms": stats(primary),
+            "shadow_ms": stats(shadow),
+            "delta_ms": stats(np.subtract(shadow, primary)),
+            "overlap": stats([r["overlap"] for r in records]),
+            "rank_corr": stats([r["rank_corr"] for r in records]),
+            "identical": round(sum(r["identical"] for r in records) / len(records), 4),
+        })
+        return report
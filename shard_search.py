@@ -0,0 +1,234 @@
+"""
+Scatter-gather search over index shards held by worker processes.
+
+embeddings_faiss.py --shards N splits the catalog into N IndexIDMap shards
+that keep global ids. ShardedIndex starts one worker process per shard, sends
+every query batch to all of them, and merges the per-shard top-k by distance.
+It exposes the same ``search(x, k) -> (D, I)`` call as a faiss index, so the
+API code paths do not change.
+
+A shard that errors, dies or misses the timeout is left out of that search:
+the caller gets a partial result (padded with id -1) instead of an error.
+Dead workers are restarted on a background thread, with exponential backoff
+if the restart fails, and are skipped until they are back.
+
+Each shard connection has its own lock, taken in shard order and released as
+soon as that shard has replied, so concurrent searches overlap across shards.
+"""
+
+import itertools
+import logging
+import multiprocessing as mp
+import threading
+import time
+from multiprocessing.connection import wait
+from typing import Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Delay before retrying a failed shard restart; doubled on each failure
+RESTART_BACKOFF_S = 1.0
+MAX_RESTART_BACKOFF_S = 60.0
+
+
+def shard_paths(prefix: str, n_shards: int) -> List[str]:
+    return [f"{prefix}.shard{i}.index" for i in range(n_shards)]
+
+
+def _serve_shard(path: str, conn):
+    """Worker process: answer (request_id, queries, k) messages until the pipe closes."""
+    import faiss
+
+    index = faiss.read_index(path)
+    conn.send(("ready", index.ntotal, index.d))
+    while True:
+        try:
+            request_id, queries, k = conn.recv()
+        except EOFError:
+            return
+        try:
+            D, I = index.search(queries, min(k, index.ntotal))
+            conn.send((request_id, D, I))
+        except Exception as e:
+            conn.send((request_id, None, str(e)))
+
+
+class _Shard:
+    def __init__(self, ctx, path: str):
+        self.path = path
+        # Held from sending a query until its reply (or the timeout)
+        self.lock = threading.Lock()
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_serve_shard, args=(path, child), daemon=True)
+        self.process.start()
+        child.close()
+        try:
+            _, self.ntotal, self.d = self.conn.recv()
+        except BaseException:
+            self.close()
+            raise
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def close(self):
+        self.conn.close()
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+class ShardedIndex:
+    """faiss-like index whose search is fanned out to per-shard worker processes."""
+
+    def __init__(self, paths: List[str], timeout: float = 0.5):
+        self.paths = paths
+        self.timeout = timeout
+        # Spawned, not forked: the API process holds torch threads and the encoder
+        self._ctx = mp.get_context("spawn")
+        self._shards = [_Shard(self._ctx, path) for path in paths]
+        self._request_ids = itertools.count(1)
+        # Guards stats and the restart bookkeeping below, never held during I/O
+        self._lock = threading.Lock()
+        self._restarting = set()
+        self._retry_at: Dict[int, float] = {}
+        self._backoff: Dict[int, float] = {}
+        self._closed = False
+        self.ntotal = sum(s.ntotal for s in self._shards)
+        self.d = self._shards[0].d
+        self.stats = {"searches": 0, "partial": 0, "restarts": 0, "restart_failures": 0}
+
+    # ---------- restarts ----------
+
+    def _live_shards(self) -> List[_Shard]:
+        """Shards whose worker is running; dead ones are restarted in the background."""
+        live = []
+        for i, shard in enumerate(self._shards):
+            if shard.alive():
+                live.append(shard)
+            else:
+                self._restart_later(i, shard)
+        return live
+
+    def _restart_later(self, i: int, shard: _Shard):
+        with self._lock:
+            if self._closed or i in self._restarting or time.monotonic() < self._retry_at.get(i, 0):
+                return
+            self._restarting.add(i)
+        threading.Thread(target=self._restart, args=(i, shard), name=f"shard-restart-{i}", daemon=True).start()
+
+    def _restart(self, i: int, shard: _Shard):
+        logger.warning(f"Restarting shard worker for {shard.path}")
+        # Wait for a search still holding the old connection
+        with shard.lock:
+            shard.close()
+        try:
+            new = _Shard(self._ctx, shard.path)
+        except Exception:
+            logger.exception(f"Could not restart shard {shard.path}")
+            with self._lock:
+                backoff = self._backoff.get(i, RESTART_BACKOFF_S)
+                self._retry_at[i] = time.monotonic() + backoff
+                self._backoff[i] = min(2 * backoff, MAX_RESTART_BACKOFF_S)
+                self.stats["restart_failures"] += 1
+                self._restarting.discard(i)
+            return
+
+        with self._lock:
+            self._restarting.discard(i)
+            if self._closed:
+                new.close()
+                return
+            self._shards[i] = new
+            self._backoff.pop(i, None)
+            self.stats["restarts"] += 1
+
+    # ---------- search ----------
+
+    def search(self, x: np.ndarray, k: int):
+        """Return merged (D, I) of shape (len(x), k); missing shards leave -1 ids at the end."""
+        request_id = next(self._request_ids)
+        deadline = time.monotonic() + self.timeout
+        shards = self._live_shards()
+
+        pending = {}
+        parts = []
+        try:
+            # Locks are taken in shard order, so concurrent searches cannot deadlock
+            for shard in shards:
+                if not shard.lock.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                    continue
+                try:
+                    shard.conn.send((request_id, x, k))
+                except (OSError, ValueError):
+                    shard.lock.release()
+                    continue
+                pending[shard.conn] = shard
+
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    ready = wait(list(pending), remaining)
+                except (OSError, ValueError):
+                    # A connection was closed mid-search (catalog closed or shard restarted)
+                    closed = [conn for conn in pending if conn.closed]
+                    if not closed:
+                        break
+                    for conn in closed:
+                        pending.pop(conn).lock.release()
+                    continue
+
+                for conn in ready:
+                    try:
+                        reply_id, D, I = conn.recv()
+                    except (EOFError, OSError):
+                        pending.pop(conn).lock.release()
+                        continue
+                    # Late replies to an earlier, timed-out search are dropped
+                    if reply_id != request_id:
+                        continue
+                    pending.pop(conn).lock.release()
+                    if D is None:
+                        logger.warning(f"Shard search failed: {I}")
+                    else:
+                        parts.append((D, I))
+        finally:
+            for shard in pending.values():
+                shard.lock.release()
+
+        with self._lock:
+            self.stats["searches"] += 1
+            if len(parts) < len(self._shards):
+                self.stats["partial"] += 1
+
+        return merge_topk(parts, len(x), k)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        for shard in self._shards:
+            shard.close()
+
+
+def merge_topk(parts, n_queries: int, k: int):
+    """Merge per-shard (D, I) results into the global top-k by ascending distance."""
+    D = np.full((n_queries, k), np.inf, dtype="float32")
+    I = np.full((n_queries, k), -1, dtype="int64")
+    if not parts:
+        return D, I
+
+    all_D = np.concatenate([d for d, _ in parts], axis=1)
+    all_I = np.concatenate([i for _, i in parts], axis=1)
+    # A shard with fewer than k items pads its own result with -1
+    all_D = np.where(all_I < 0, np.inf, all_D)
+
+    order = np.argsort(all_D, axis=1, kind="stable")[:, :k]
+    width = order.shape[1]
+    D[:, :width] = np.take_along_axis(all_D, order, axis=1)
+    I[:, :width] = np.take_along_axis(all_I, order, axis=1)
+    I[np.isinf(D)] = -1
+    return D, I
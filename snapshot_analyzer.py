@@ -0,0 +1,184 @@
+"""
+Analyze saved SHL catalog HTML snapshots.
+
+Memory-maps any number of saved pages (e.g. debug_catalog_page.html,
+debug_rendered_page.html or a directory of historical snapshots), scans them
+in a process pool with precompiled byte-level regexes and prints one
+consolidated report: product URLs, tables, embedded JSON/script data sources
+and pagination links, plus URL changes between consecutive snapshots.
+
+Usage:
+    python snapshot_analyzer.py
+    python snapshot_analyzer.py snapshots/*.html --workers 8 --json report.json
+"""
+
+import argparse
+import glob
+import html
+import json
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+DEFAULT_SNAPSHOTS = ["debug_catalog_page.html", "debug_rendered_page.html"]
+
+PRODUCT_URL_RE = re.compile(rb'/products/product-catalog/view/[^"\'<>\s\\)]+')
+PAGINATION_RE = re.compile(rb'product-catalog/\?start=(\d+)(?:&amp;|&)type=(\d+)')
+TABLE_RE = re.compile(rb'<table\b.*?</table>', re.S | re.I)
+TH_RE = re.compile(rb'<th\b[^>]*>(.*?)</th>', re.S | re.I)
+TR_RE = re.compile(rb'<tr\b', re.I)
+TAG_RE = re.compile(rb'<[^>]+>')
+SCRIPT_RE = re.compile(rb'<script\b([^>]*)>(.*?)</script>', re.S | re.I)
+JSON_SCRIPT_RE = re.compile(rb'type\s*=\s*["\']application/(?:ld\+)?json["\']', re.I)
+CATALOG_KEYWORD_RE = re.compile(rb'product|catalog|assessment', re.I)
+STATE_RE = re.compile(rb'window\.(__[A-Z_]+__)\s*=')
+ROW_ID_RE = re.compile(rb'<tr[^>]*\bdata-(entity|course)-id="(\d+)"')
+DATA_ATTR_RE = re.compile(rb'\sdata-[\w-]+=')
+
+
+def _text(fragment: bytes) -> str:
+    """Strip tags and collapse whitespace in an HTML fragment."""
+    text = TAG_RE.sub(b" ", fragment).decode("utf-8", "replace")
+    return " ".join(html.unescape(text).split())
+
+
+def analyze_snapshot(path: str) -> Dict:
+    """Scan one snapshot. Runs in a worker process."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return {"path": path, "bytes": 0, "error": "empty file"}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            urls = sorted({m.group(0).decode("utf-8", "replace") for m in PRODUCT_URL_RE.finditer(buf)})
+
+            tables = []
+            for m in TABLE_RE.finditer(buf):
+                table = m.group(0)
+                tables.append({
+                    "headers": [_text(h) for h in TH_RE.findall(table)],
+                    "rows": len(TR_RE.findall(table)),
+                })
+
+            pagination = {}
+            for m in PAGINATION_RE.finditer(buf):
+                listing_type = m.group(2).decode()
+                start = int(m.group(1))
+                pagination[listing_type] = max(pagination.get(listing_type, 0), start)
+
+            scripts = {"total": 0, "json": 0, "catalog_related": 0}
+            for m in SCRIPT_RE.finditer(buf):
+                scripts["total"] += 1
+                if JSON_SCRIPT_RE.search(m.group(1)):
+                    scripts["json"] += 1
+                if CATALOG_KEYWORD_RE.search(m.group(2)):
+                    scripts["catalog_related"] += 1
+
+            row_ids = {}
+            for m in ROW_ID_RE.finditer(buf):
+                kind = m.group(1).decode()
+                row_ids[kind] = row_ids.get(kind, 0) + 1
+
+            return {
+                "path": path,
+                "bytes": len(buf),
+                "mtime": os.path.getmtime(path),
+                "product_urls": urls,
+                "tables": tables,
+                "pagination_max_start": pagination,
+                "scripts": scripts,
+                "state_objects": sorted({m.group(1).decode() for m in STATE_RE.finditer(buf)}),
+                "row_ids": row_ids,
+                "data_attributes": len(DATA_ATTR_RE.findall(buf)),
+            }
+
+
+def analyze(paths: List[str], workers: int = None) -> Dict:
+    """Analyze snapshots in a process pool and build a consolidated report."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(analyze_snapshot, paths, chunksize=max(1, len(paths) // 64)))
+
+    snapshots = [r for r in results if "error" not in r]
+    snapshots.sort(key=lambda r: (r["mtime"], r["path"]))
+
+    all_urls = set()
+    previous = None
+    for snap in snapshots:
+        current = set(snap["product_urls"])
+        all_urls |= current
+        if previous is not None:
+            snap["added_urls"] = sorted(current - previous)
+            snap["removed_urls"] = sorted(previous - current)
+        previous = current
+
+    return {
+        "snapshots": snapshots,
+        "errors": [r for r in results if "error" in r],
+        "total_bytes": sum(r["bytes"] for r in results),
+        "unique_product_urls": sorted(all_urls),
+    }
+
+
+def print_report(report: Dict, show_urls: int = 30):
+    print("=" * 80)
+    print("CATALOG SNAPSHOT REPORT")
+    print("=" * 80)
+
+    for snap in report["snapshots"]:
+        print(f"\n{snap['path']} ({snap['bytes']:,} bytes)")
+        print(f"  Product URLs: {len(snap['product_urls'])}")
+        print(f"  Tables: {len(snap['tables'])}")
+        for i, table in enumerate(snap["tables"][:5], 1):
+            print(f"    Table {i}: {table['rows']} rows, headers {table['headers']}")
+        print(f"  Pagination (max start per type): {snap['pagination_max_start'] or 'none'}")
+        print(f"  Row ids: {snap['row_ids'] or 'none'}")
+        scripts = snap["scripts"]
+        print(f"  Scripts: {scripts['total']} total, {scripts['json']} JSON, "
+              f"{scripts['catalog_related']} catalog-related")
+        print(f"  Window state objects: {snap['state_objects'] or 'none'}")
+        print(f"  Elements with data attributes: {snap['data_attributes']}")
+        if "added_urls" in snap:
+            print(f"  Since previous snapshot: +{len(snap['added_urls'])} / -{len(snap['removed_urls'])} URLs")
+
+    for err in report["errors"]:
+        print(f"\n[ERROR] {err['path']}: {err['error']}")
+
+    urls = report["unique_product_urls"]
+    print(f"\n{'=' * 80}")
+    print(f"Snapshots: {len(report['snapshots'])} | Bytes scanned: {report['total_bytes']:,} | "
+          f"Unique product URLs: {len(urls)}")
+    if show_urls:
+        print(f"\nFirst {min(show_urls, len(urls))} URLs:")
+        for i, url in enumerate(urls[:show_urls], 1):
+            print(f"{i}. {url}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze saved catalog HTML snapshots")
+    parser.add_argument("paths", nargs="*", help="HTML files, directories or glob patterns")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--json", dest="json_path", help="also write the full report as JSON")
+    parser.add_argument("--show-urls", type=int, default=30, help="number of URLs to list")
+    args = parser.parse_args()
+
+    paths = []
+    for pattern in args.paths or DEFAULT_SNAPSHOTS:
+        if os.path.isdir(pattern):
+            paths.extend(sorted(glob.glob(os.path.join(pattern, "*.htm*"))))
+        else:
+            paths.extend(sorted(glob.glob(pattern)))
+
+    if not paths:
+        parser.error("no snapshot files found")
+
+    report = analyze(paths, args.workers)
+    print_report(report, args.show_urls)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Assessment-name autocomplete.
+
+A character trie over every token-suffix of each normalized assessment name
+("core java advanced", "java advanced", "advanced"), so a prefix matches at
+the start of any word. Every node stores its top-N completions at build time,
+ranked by: match at the start of the name first, then shorter names, then
+alphabetical. A lookup walks at most len(prefix) nodes and does no ranking.
+"""
+
+import re
+from typing import Sequence, Tuple
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+class SuggestIndex:
+    """Prefix trie with precomputed top-N catalog ids per node."""
+
+    def __init__(self, names: Sequence[str], top_n: int = 10):
+        self.top_n = top_n
+        # Node: [children dict, completion ids]
+        self._root = [{}, []]
+
+        entries = []
+        for idx, name in enumerate(names):
+            tokens = normalize(name).split()
+            for pos in range(len(tokens)):
+                key = " ".join(tokens[pos:])
+                entries.append(((pos > 0, len(name), name.lower()), key, idx))
+
+        # Inserting best-first means each node keeps its first top_n distinct ids
+        for _, key, idx in sorted(entries):
+            node = self._root
+            self._add(node, idx)
+            for ch in key:
+                child = node[0].get(ch)
+                if child is None:
+                    child = node[0][ch] = [{}, []]
+                node = child
+                self._add(node, idx)
+
+        self._freeze(self._root)
+
+    def _add(self, node, idx: int):
+        ids = node[1]
+        if len(ids) < self.top_n and idx not in ids:
+            ids.append(idx)
+
+    def _freeze(self, root):
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            node[1] = tuple(node[1])
+            stack.extend(node[0].values())
+
+    def lookup(self, prefix: str, limit: int = None) -> Tuple[int, ...]:
+        """Catalog ids completing ``prefix``, best first."""
+        node = self._root
+        for ch in normalize(prefix):
+            node = node[0].get(ch)
+            if node is None:
+                return ()
+        ids = node[1]
+        return ids[:limit] if limit else ids
@@ -0,0 +1,172 @@
+"""
+JobDescriptionFetcher against a local stub HTTP server.
+
+    python -m pytest -q test_url_ingest.py
+"""
+
+import asyncio
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import url_ingest
+from url_ingest import FetchError, JobDescriptionFetcher, UnsafeURL
+
+JD_HTML = b"<html><body><nav>menu</nav><main>Hiring a Java developer</main></body></html>"
+ETAG = '"jd-v1"'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, body: bytes, headers=(), length=True):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        if length:
+            self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/jd":
+            if self.headers.get("If-None-Match") == ETAG:
+                self.send_response(304)
+                self.send_header("ETag", ETAG)
+                self.end_headers()
+            else:
+                self.send_body(JD_HTML, [("ETag", ETAG)])
+        elif self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/jd")
+            self.end_headers()
+        elif self.path == "/loop":
+            self.send_response(307)
+            self.send_header("Location", "/loop")
+            self.end_headers()
+        elif self.path == "/big":
+            # No Content-Length: the cap has to be enforced while streaming
+            self.send_body(b"<p>" + b"x" * 5000 + b"</p>", length=False)
+        elif self.path == "/big-declared":
+            self.send_body(b"<p>" + b"x" * 5000 + b"</p>")
+        else:
+            self.send_error(404)
+
+
+class FetcherTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.server.requests = []
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.requests.clear()
+
+    def run_fetcher(self, coro_fn, **kwargs):
+        async def run():
+            fetcher = JobDescriptionFetcher(**kwargs)
+            try:
+                return await coro_fn(fetcher)
+            finally:
+                await fetcher.aclose()
+        return asyncio.run(run())
+
+    def test_extracts_main_text(self):
+        text = self.run_fetcher(lambda f: f.fetch_text(f"{self.base}/jd"), allow_private=True)
+        self.assertEqual(text, "Hiring a Java developer")
+
+    def test_follows_redirects(self):
+        text = self.run_fetcher(lambda f: f.fetch_text(f"{self.base}/redirect"), allow_private=True)
+        self.assertEqual(text, "Hiring a Java developer")
+        self.assertEqual([path for path, _ in self.server.requests], ["/redirect", "/jd"])
+
+    def test_redirect_limit(self):
+        with self.assertRaisesRegex(FetchError, "Too many redirects"):
+            self.run_fetcher(lambda f: f.fetch_text(f"{self.base}/loop"), allow_private=True)
+
+    def test_size_cap(self):
+        for path in ("/big", "/big-declared"):
+            with self.assertRaisesRegex(FetchError, "too large"):
+                self.run_fetcher(lambda f: f.fetch_text(f"{self.base}{path}"),
+                                 allow_private=True, max_bytes=1000)
+
+    def test_revalidates_with_etag(self):
+        async def twice(fetcher):
+            first = await fetcher.fetch_text(f"{self.base}/jd")
+            second = await fetcher.fetch_text(f"{self.base}/jd")
+            return first, second, dict(fetcher.stats)
+
+        first, second, stats = self.run_fetcher(twice, allow_private=True, fresh_seconds=0)
+        self.assertEqual(first, second)
+        self.assertEqual(self.server.requests, [("/jd", None), ("/jd", ETAG)])
+        self.assertEqual(stats["revalidated_hits"], 1)
+
+    def test_blocks_private_addresses(self):
+        for url in (f"{self.base}/jd", "http://localhost:1/jd", "http://[::1]:1/jd", "ftp://example.com/jd"):
+            with self.assertRaises(UnsafeURL):
+                self.run_fetcher(lambda f: f.fetch_text(url))
+        self.assertEqual(self.server.requests, [])
+
+    def test_blocks_private_redirect_target(self):
+        # A public page redirecting to an internal one: only the first hop may connect
+        real = url_ingest.is_public_address
+        checks = []
+
+        def first_hop_public(address):
+            checks.append(address)
+            return len(checks) == 1 or real(address)
+
+        async def fetch(fetcher):
+            with mock.patch.object(url_ingest, "is_public_address", first_hop_public):
+                return await fetcher.fetch_text(f"{self.base}/redirect")
+
+        # The stub speaks HTTP/1.0, so each hop opens (and checks) a new connection
+        with self.assertRaises(UnsafeURL):
+            self.run_fetcher(fetch)
+        self.assertEqual([path for path, _ in self.server.requests], ["/redirect"])
+
+    def test_connects_to_the_checked_address(self):
+        # DNS rebinding: a second lookup would return an internal address. The
+        # backend resolves once and connects to the address it checked.
+        port = self.server.server_address[1]
+        lookups = []
+
+        async def fetch(fetcher):
+            loop = asyncio.get_running_loop()
+
+            async def getaddrinfo(host, *args, **kwargs):
+                lookups.append(host)
+                if len(lookups) > 1:
+                    return [(2, 1, 6, "", ("169.254.169.254", port))]
+                return [(2, 1, 6, "", ("127.0.0.1", port))]
+
+            with mock.patch.object(loop, "getaddrinfo", getaddrinfo), \
+                    mock.patch.object(url_ingest, "is_public_address", lambda a: a == "127.0.0.1"):
+                return await fetcher.fetch_text(f"http://jobs.example:{port}/jd")
+
+        self.assertEqual(self.run_fetcher(fetch), "Hiring a Java developer")
+        self.assertEqual(lookups, ["jobs.example"])
+
+    def test_cache_bounded_by_text_length(self):
+        fetcher = JobDescriptionFetcher(cache_chars=10)
+        fetcher._remember("a", None, "12345")
+        fetcher._remember("b", None, "123456")
+        fetcher._remember("c", None, "x" * 11)
+        self.assertEqual(list(fetcher._cache), ["b"])
+        self.assertEqual(fetcher._cached_chars, 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
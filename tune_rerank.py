@@ -0,0 +1,175 @@
+"""
+Auto-tune rerank quotas, candidate depth and intent keywords on train.csv.
+
+FAISS candidate lists for all train queries are computed once (one batched
+encode + search) and cached to disk. Configs are then sampled from a grid of
+quota tables, candidate depths and intent keyword sets, scored in a process
+pool with vectorized Recall@10, and the best one is written to
+rerank_config.json, which api.py loads at startup.
+
+Usage:
+    python tune_rerank.py --trials 5000 --workers 4
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import rerank
+from catalog_artifact import load_store
+from catalog_store import CatalogStore, url_slug
+
+CACHE_PATH = "tune_cache.npz"
+CONFIG_PATH = "rerank_config.json"
+
+MAX_DEPTH = 30
+DEPTHS = [5, 10, 15, 20, 30]
+TOP_N = 10
+
+TECH_POOL = ["java", "developer", "coding", "software", "python", "sql", "javascript",
+             "engineer", "programming", "data", "analyst", "technical"]
+SOFT_POOL = ["communication", "leadership", "behavior", "personality", "teamwork",
+             "collaborat", "interpersonal", "sales", "customer", "manag"]
+
+INTENTS = ["balanced", "technical", "behavioral"]
+
+
+def load_train(store: CatalogStore):
+    """Group train.csv by query. Returns (queries, relevance matrix [n_queries, n_items])."""
+    df = pd.read_csv("train.csv")
+
+    queries, rows = [], []
+    for query, group in df.groupby("Query", sort=False):
+        ids = {store.ids_by_slug.get(url_slug(u)) for cell in group["Assessment_url"] for u in cell.split("|")}
+        ids.discard(None)
+        if ids:
+            queries.append(query)
+            rows.append(sorted(ids))
+
+    relevance = np.zeros((len(queries), len(store)), dtype=bool)
+    for q, ids in enumerate(rows):
+        relevance[q, ids] = True
+    return queries, relevance
+
+
+def candidate_cache(queries, n_items: int):
+    """Return the cached [n_queries, MAX_DEPTH] FAISS candidate ids, computing them once."""
+    key = hashlib.sha1("\n".join(queries).encode("utf-8")).hexdigest()
+    index_mtime = os.path.getmtime("shl_faiss.index")
+    if os.path.exists(CACHE_PATH):
+        cached = np.load(CACHE_PATH)
+        if str(cached["key"]) == key and float(cached["index_mtime"]) == index_mtime:
+            return cached["ids"]
+
+    import faiss
+    from sentence_transformers import SentenceTransformer
+
+    index = faiss.read_index("shl_faiss.index")
+    model = SentenceTransformer("all-MiniLM-L6-v2")
+    q_emb = model.encode(queries, batch_size=64).astype("float32")
+    _, ids = index.search(q_emb, min(MAX_DEPTH, n_items))
+
+    np.savez(CACHE_PATH, ids=ids, key=key, index_mtime=index_mtime)
+    return ids
+
+
+def sample_configs(trials: int, seed: int):
+    """Current defaults first, then random draws from the search space."""
+    rng = random.Random(seed)
+    yield {
+        "candidate_depth": rerank.CANDIDATE_DEPTH,
+        "quotas": {intent: list(q) for intent, q in rerank.QUOTAS.items()},
+        "tech_keywords": list(rerank.TECH_KEYWORDS),
+        "soft_keywords": list(rerank.SOFT_KEYWORDS),
+    }
+
+    splits = [(k, p) for k, p in itertools.product(range(TOP_N + 1), repeat=2) if 0 < k + p <= TOP_N]
+    for _ in range(trials - 1):
+        quotas = {}
+        for intent in INTENTS:
+            k, p = rng.choice(splits)
+            quotas[intent] = [("P", p), ("K", k)] if intent == "behavioral" else [("K", k), ("P", p)]
+        yield {
+            "candidate_depth": rng.choice(DEPTHS),
+            "quotas": quotas,
+            "tech_keywords": sorted(set(rerank.TECH_KEYWORDS) | set(rng.sample(TECH_POOL, rng.randint(0, 6)))),
+            "soft_keywords": sorted(set(rerank.SOFT_KEYWORDS) | set(rng.sample(SOFT_POOL, rng.randint(0, 6)))),
+        }
+
+
+# ---------- worker process state ----------
+_STATE = {}
+
+
+def _init_worker(queries, candidates, relevance, type_codes, valid):
+    _STATE.update(queries=queries, candidates=candidates, relevance=relevance,
+                  type_codes=type_codes, valid=valid)
+
+
+def score_config(config) -> float:
+    """Mean Recall@10 of one config over all train queries."""
+    queries = _STATE["queries"]
+    candidates = _STATE["candidates"][:, :config["candidate_depth"]]
+    relevance = _STATE["relevance"]
+
+    intents = np.array([
+        rerank.INTENT_CODES[rerank.infer_intent(query, config["tech_keywords"], config["soft_keywords"])]
+        for query in queries
+    ])
+    selected = rerank.rerank_batch(candidates, _STATE["type_codes"], _STATE["valid"],
+                                   intents, TOP_N, config["quotas"])
+
+    rows = np.arange(len(queries))[:, None]
+    hits = relevance[rows, np.maximum(selected, 0)] & (selected >= 0)
+    return float((hits.sum(axis=1) / relevance.sum(axis=1)).mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune rerank quotas and retrieval depth on train.csv")
+    parser.add_argument("--trials", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=CONFIG_PATH)
+    args = parser.parse_args()
+
+    store = load_store()
+
+    queries, relevance = load_train(store)
+    print(f"Tuning on {len(queries)} train queries with ground truth in the catalog")
+    if not queries:
+        print("No overlapping ground-truth URLs found. Nothing to tune.")
+        return
+
+    candidates = candidate_cache(queries, len(store))
+    configs = list(sample_configs(args.trials, args.seed))
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_worker,
+        initargs=(queries, candidates, relevance, store.type_codes, store.valid),
+    ) as pool:
+        scores = list(pool.map(score_config, configs, chunksize=max(1, len(configs) // 64)))
+    elapsed = time.perf_counter() - start
+
+    best = int(np.argmax(scores))
+    print(f"Scored {len(configs)} configs in {elapsed:.1f}s")
+    print(f"Current config Recall@10: {scores[0]:.3f}")
+    print(f"Best config Recall@10:    {scores[best]:.3f}")
+
+    config = dict(configs[best], recall_at_10=round(scores[best], 4))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    print(f"Best config written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
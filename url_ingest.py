@@ -0,0 +1,275 @@
+"""
+Job description URL ingestion.
+
+Fetches job description pages with a pooled async HTTP client, extracts the
+main text and caches it by URL. Cached entries are served without any network
+traffic for ``fresh_seconds``; after that they are revalidated with the
+stored ETag, and a 304 reuses the cached text without re-parsing. The cache is
+bounded by the total length of the cached text as well as the entry count.
+
+URLs come from API callers, so only http(s) URLs are fetched, redirects are
+followed by hand (every hop is checked), bodies are streamed and abandoned
+once they exceed ``max_bytes``, and HTML parsing runs in a worker thread.
+Hosts are resolved once, by the client's network backend at connect time:
+every address must be public, and the connection goes to the address that
+was checked, so a DNS-rebinding host cannot swap in an internal one between
+the check and the connect. TLS still uses the URL's hostname for SNI and
+certificate verification.
+"""
+
+import asyncio
+import ipaddress
+import re
+import socket
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+import httpcore
+import httpx
+from bs4 import BeautifulSoup
+
+USER_AGENT = "Mozilla/5.0 (compatible; SHLAssessmentRecommender/1.0)"
+
+# Tags that never contain job description text
+NOISE_TAGS = ["script", "style", "noscript", "nav", "header", "footer", "aside", "form", "svg"]
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+MAX_REDIRECTS = 5
+
+
+class FetchError(Exception):
+    """Raised when a job description page cannot be fetched or has no text."""
+
+
+class UnsafeURL(FetchError):
+    """Raised for URLs that are not http(s) or point at non-public addresses."""
+
+
+def is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not (ip.is_private or ip.is_loopback or ip.is_link_local
+                                 or ip.is_reserved or ip.is_multicast or ip.is_unspecified)
+
+
+def check_url(url: str):
+    """Reject anything but absolute http(s) URLs."""
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise UnsafeURL(f"Unsupported URL: {url}")
+
+
+async def resolve_public(host: str, port: int, timeout: Optional[float] = None) -> str:
+    """Resolve ``host`` and return the address to connect to; every address must be public."""
+    try:
+        infos = await asyncio.wait_for(
+            asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM), timeout
+        )
+    except (socket.gaierror, UnicodeError) as e:
+        raise FetchError(f"Could not resolve {host}: {e}") from e
+    except asyncio.TimeoutError as e:
+        raise FetchError(f"Timed out resolving {host}") from e
+    if not infos or not all(is_public_address(info[4][0]) for info in infos):
+        raise UnsafeURL(f"{host} does not resolve to a public address")
+    return infos[0][4][0]
+
+
+class PublicOnlyBackend(httpcore.AnyIOBackend):
+    """Network backend that connects only to a public address it resolved itself."""
+
+    def __init__(self, allow_private: bool = False):
+        self.allow_private = allow_private
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        if not self.allow_private:
+            host = await resolve_public(host, port, timeout)
+        return await super().connect_tcp(host, port, timeout, local_address, socket_options)
+
+
+class PinnedTransport(httpx.AsyncHTTPTransport):
+    """httpx transport whose connection pool connects through PublicOnlyBackend."""
+
+    def __init__(self, limits: httpx.Limits, allow_private: bool = False):
+        super().__init__(limits=limits)
+        # Same pool httpx builds, with the checking backend plugged in (httpx has
+        # no public option for the network backend)
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=PublicOnlyBackend(allow_private),
+        )
+
+
+def extract_main_text(html: str) -> str:
+    """Extract the readable main text from an HTML page."""
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(NOISE_TAGS):
+        tag.decompose()
+
+    main = soup.find("main") or soup.find("article") or soup.find(attrs={"role": "main"}) or soup.body or soup
+    return WHITESPACE_RE.sub(" ", main.get_text(" ", strip=True)).strip()
+
+
+class JobDescriptionFetcher:
+    """Async job description fetcher with per-host limits and an extracted-text cache."""
+
+    def __init__(self, max_connections: int = 20, per_host_limit: int = 4,
+                 timeout: float = 10.0, cache_size: int = 1024, cache_chars: int = 20_000_000,
+                 fresh_seconds: float = 300.0, max_bytes: int = 2_000_000,
+                 allow_private: bool = False):
+        self.per_host_limit = per_host_limit
+        # Only for local testing against e.g. python -m http.server
+        self.allow_private = allow_private
+        self.fresh_seconds = fresh_seconds
+        self.max_bytes = max_bytes
+        self.cache_size = cache_size
+        # Bound on the summed length of cached texts; a longer text is not cached
+        self.cache_chars = cache_chars
+        self._cached_chars = 0
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+        self.timeout = httpx.Timeout(timeout)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        # url -> {"etag": str | None, "text": str, "checked": float}
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self.stats = {"fetches": 0, "fresh_hits": 0, "revalidated_hits": 0}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                transport=PinnedTransport(self.limits, self.allow_private),
+                timeout=self.timeout,
+                # Redirects are followed by hand so every hop is checked
+                follow_redirects=False,
+                # Environment proxies would resolve hosts themselves, past the check
+                trust_env=False,
+                headers={"User-Agent": USER_AGENT},
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_slots[host]
+
+    def _remember(self, url: str, etag: Optional[str], text: str):
+        old = self._cache.pop(url, None)
+        if old is not None:
+            self._cached_chars -= len(old["text"])
+        if len(text) > self.cache_chars:
+            return
+        self._cache[url] = {"etag": etag, "text": text, "checked": time.monotonic()}
+        self._cached_chars += len(text)
+        while len(self._cache) > self.cache_size or self._cached_chars > self.cache_chars:
+            _, evicted = self._cache.popitem(last=False)
+            self._cached_chars -= len(evicted["text"])
+
+    async def _get(self, url: str, headers: Dict[str, str]):
+        """GET with checked redirects; returns (status, headers, body, encoding).
+
+        The body is streamed and the request abandoned once it exceeds ``max_bytes``.
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            check_url(url)
+            async with self.client.stream("GET", url, headers=headers) as response:
+                # is_redirect is true for any 3xx, including a 304 revalidation
+                if response.has_redirect_location:
+                    url = urljoin(url, response.headers["Location"])
+                    continue
+                if response.status_code != 200:
+                    return response.status_code, response.headers, b"", None
+
+                declared = response.headers.get("Content-Length")
+                if declared and declared.isdigit() and int(declared) > self.max_bytes:
+                    raise FetchError(f"Page too large: {url}")
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body.extend(chunk)
+                    if len(body) > self.max_bytes:
+                        raise FetchError(f"Page too large: {url}")
+                return response.status_code, response.headers, bytes(body), response.encoding
+        raise FetchError(f"Too many redirects: {url}")
+
+    async def fetch_text(self, url: str) -> str:
+        """Return the main text of the page at ``url``, using the cache when possible."""
+        if urlparse(url).scheme not in ("http", "https"):
+            raise UnsafeURL(f"Unsupported URL: {url}")
+
+        cached = self._cache.get(url)
+        if cached and time.monotonic() - cached["checked"] < self.fresh_seconds:
+            self._cache.move_to_end(url)
+            self.stats["fresh_hits"] += 1
+            return cached["text"]
+
+        headers = {}
+        if cached and cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+
+        async with self._host_slot(url):
+            try:
+                self.stats["fetches"] += 1
+                status, response_headers, body, encoding = await self._get(url, headers)
+            except httpx.HTTPError as e:
+                raise FetchError(f"Could not fetch {url}: {e}") from e
+
+        if status == 304 and cached:
+            self.stats["revalidated_hits"] += 1
+            self._remember(url, cached["etag"], cached["text"])
+            return cached["text"]
+
+        if status != 200:
+            raise FetchError(f"Could not fetch {url}: HTTP {status}")
+
+        html = body.decode(encoding or "utf-8", errors="replace")
+        text = await asyncio.to_thread(extract_main_text, html)
+        if not text:
+            raise FetchError(f"No text found at {url}")
+
+        self._remember(url, response_headers.get("ETag"), text)
+        return text
+
+    async def fetch_many(self, urls: List[str]) -> List:
+        """Fetch several URLs concurrently. Failed URLs yield their FetchError."""
+        return await asyncio.gather(
+            *(self.fetch_text(url) for url in urls),
+            return_exceptions=True,
+        )
+
+
+async def _main(urls: List[str]):
+    fetcher = JobDescriptionFetcher(allow_private=True)
+    try:
+        start = time.perf_counter()
+        results = await fetcher.fetch_many(urls)
+        elapsed = time.perf_counter() - start
+    finally:
+        await fetcher.aclose()
+
+    for url, result in zip(urls, results):
+        if isinstance(result, Exception):
+            print(f"[ERROR] {url}: {result}")
+        else:
+            print(f"[OK] {url}: {len(result)} chars - {result[:80]}")
+    print(f"Fetched {len(urls)} URLs in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    # e.g. python -m http.server 8001 & python url_ingest.py http://127.0.0.1:8001/jd.html
+    import sys
+    asyncio.run(_main(sys.argv[1:]))